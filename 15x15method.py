@@ -1,4 +1,4 @@
-from ortools.constraint_solver import pywrapcp, routing_enums_pb2
+from vrp.solver import print_solution, solve
 
 def create_data_model():
     """创建数据模型"""
@@ -26,72 +26,17 @@ def create_data_model():
     data['depot'] = 0
     return data
 
-def print_solution(data, manager, routing, solution):
-    """打印解决方案"""
-    total_distance = 0
-    for vehicle_id in range(data['num_vehicles']):
-        index = routing.Start(vehicle_id)
-        plan_output = 'Route for vehicle {}:\n'.format(vehicle_id)
-        route_distance = 0
-        while not routing.IsEnd(index):
-            plan_output += ' {} ->'.format(manager.IndexToNode(index))
-            previous_index = index
-            index = solution.Value(routing.NextVar(index))
-            route_distance += routing.GetArcCostForVehicle(previous_index, index, vehicle_id)
-        plan_output += ' {}\n'.format(manager.IndexToNode(index))
-        plan_output += 'Distance of the route: {}m\n'.format(route_distance)
-        print(plan_output)
-        total_distance += route_distance
-    print('Total Distance of all routes: {}m'.format(total_distance))
-
 def main():
     """解决VRP问题"""
     data = create_data_model()
 
-    # 创建路由索引管理器。
-    manager = pywrapcp.RoutingIndexManager(len(data['distance_matrix']),
-                                           data['num_vehicles'], data['depot'])
-
-    # 创建Routing Model.
-    routing = pywrapcp.RoutingModel(manager)
-
-    # 创建并注册一个传递回调函数。
-    def distance_callback(from_index, to_index):
-        # 返回两个节点之间的距离。
-        from_node = manager.IndexToNode(from_index)
-        to_node = manager.IndexToNode(to_index)
-        return data['distance_matrix'][from_node][to_node]
-
-    transit_callback_index = routing.RegisterTransitCallback(distance_callback)
-
-    # 定义成本的每条边
-    routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
-
-    # 添加容量约束。
-    def demand_callback(from_index):
-        from_node = manager.IndexToNode(from_index)
-        return data['demands'][from_node]
-
-    demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
-
-    routing.AddDimensionWithVehicleCapacity(
-        demand_callback_index,
-        0,  # null capacity slack
-        data['vehicle_capacities'],  # vehicle maximum capacities
-        True,  # start cumul to zero
-        'Capacity')
-
-    # 设置启发式。
-    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
-    search_parameters.first_solution_strategy = (
-        routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC)
-
     # 求解路径规划。
-    solution = routing.SolveWithParameters(search_parameters)
+    solution = solve(data, first_solution_strategy='PATH_CHEAPEST_ARC')
 
     # 打印解决方案。
     if solution:
-        print_solution(data, manager, routing, solution)
+        print_solution(solution)
+
 
 if __name__ == '__main__':
     main()
@@ -1,6 +1,4 @@
-from ortools.constraint_solver import routing_enums_pb2
-from ortools.constraint_solver import pywrapcp
-import numpy as np
+from vrp.solver import print_solution, solve, with_cost
 
 
 def create_data_model(distance_matrix, demands, vehicle_capacity):
@@ -14,28 +12,6 @@ def create_data_model(distance_matrix, demands, vehicle_capacity):
     return data_model
 
 
-def print_solution(data, manager, routing, solution):
-    """Prints solution on console."""
-    total_distance = 0
-    for vehicle_id in range(data['num_vehicles']):
-        index = routing.Start(vehicle_id)
-        plan_output = f'Route for vehicle {vehicle_id}:\n'
-        route_distance = 0
-        while not routing.IsEnd(index):
-            node_index = manager.IndexToNode(index)
-            plan_output += f' {node_index} -> '
-            previous_index = index
-            index = solution.Value(routing.NextVar(index))
-            if index == routing.Start(vehicle_id):
-                break
-            route_distance += routing.GetArcCostForVehicle(previous_index, index, vehicle_id)
-        plan_output += f'{manager.IndexToNode(index)}\n'
-        plan_output += f'Distance of the route for vehicle {vehicle_id}: {route_distance}m\n'
-        print(plan_output)
-        total_distance += route_distance
-    print(f'Total distance of all routes: {total_distance}m')
-
-
 def main():
     """Entry point of the program."""
 
@@ -63,90 +39,13 @@ def main():
     # 创建数据模型
     data_model = create_data_model(distance_matrix, demands, vehicle_capacity)
 
-    # 创建路由索引管理器
-    manager = pywrapcp.RoutingIndexManager(len(data_model['distance_matrix']), data_model['num_vehicles'],
-                                           data_model['depot'])
-
-    # 创建路由模型
-    routing = pywrapcp.RoutingModel(manager)
-
-    # 创建并注册转移回调
-    def distance_callback(from_index, to_index):
-        # 返回两个节点之间的距离
-        return data_model['distance_matrix'][manager.IndexToNode(from_index)][manager.IndexToNode(to_index)]
-
-    transit_callback_index = routing.RegisterTransitCallback(distance_callback)
-
-    # 定义每条弧的成本
-    routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
-
-    # 设置车辆的最大行驶距离
-    routing.AddDimension(transit_callback_index, 0, 1000, True, 'Distance')
-    distance_dimension = routing.GetDimensionOrDie('Distance')
-    distance_dimension.SetGlobalSpanCostCoefficient(100)
-
-    # 添加车辆容量约束
-    def demand_callback(from_index):
-        """Returns the demand of the node."""
-        from_node = manager.IndexToNode(from_index)
-        return data_model['demands'][from_node]
-
-    demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
-    routing.AddDimensionWithVehicleCapacity(
-        demand_callback_index,
-        0,  # null capacity slack
-        data_model['vehicle_capacity'],  # vehicle maximum capacities
-        True,  # start cumul to zero
-        'Capacity')
-
-    # 设置车辆的起始位置
-    depot = data_model['depot']
-    for i in range(data_model['num_vehicles']):
-        routing.AddVariableMinimizedByFinalizer(distance_dimension.CumulVar(manager.NodeToIndex(depot)))
-
-    # 设置搜索参数
-    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
-    search_parameters.first_solution_strategy = (
-        routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC)
-
-    # 解决问题
-    solution = routing.SolveWithParameters(search_parameters)
+    # 限制每辆车的最大行驶距离，并平衡各车的路程
+    solution = solve(data_model, first_solution_strategy='PATH_CHEAPEST_ARC',
+                     max_distance=1000, span_cost_coefficient=100)
 
     # 在控制台上打印解决方案
     if solution:
-        print_solution(data_model, manager, routing, solution)
-
-def print_solution(data, manager, routing, solution):
-    """Prints solution on console."""
-    total_distance = 0
-    total_transportation_cost = 0  # 总运输成本
-    for vehicle_id in range(data['num_vehicles']):
-        index = routing.Start(vehicle_id)
-        plan_output = f'Route for vehicle {vehicle_id}:\n'
-        route_distance = 0
-        route_transportation_cost = 0  # 当前车辆的运输成本
-        while not routing.IsEnd(index):
-            node_index = manager.IndexToNode(index)
-            plan_output += f' {node_index} -> '
-            previous_index = index
-            index = solution.Value(routing.NextVar(index))
-            if index == routing.Start(vehicle_id):
-                break
-            arc_distance = routing.GetArcCostForVehicle(previous_index, index, vehicle_id)
-            route_distance += arc_distance
-            # 计算当前节点的运输成本
-            demand = data['demands'][node_index]
-            transportation_cost = arc_distance * 1.5 * demand  # 每个货物每km1.5元
-            route_transportation_cost += transportation_cost
-        plan_output += f'{manager.IndexToNode(index)}\n'
-        plan_output += f'Distance of the route for vehicle {vehicle_id}: {route_distance}m\n'
-        plan_output += f'Transportation cost of the route for vehicle {vehicle_id}: {route_transportation_cost}元\n'
-        print(plan_output)
-        total_distance += route_distance
-        total_transportation_cost += route_transportation_cost
-    print(f'Total distance of all routes: {total_distance}m')
-    print(f'Total transportation cost: {total_transportation_cost}')
-
+        print_solution(with_cost(data_model, solution, 'demand_distance'))
 
 
 if __name__ == '__main__':
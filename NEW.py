@@ -1,5 +1,6 @@
-from ortools.constraint_solver import routing_enums_pb2
-from ortools.constraint_solver import pywrapcp
+from functools import partial
+
+from vrp.solver import distance_cost, print_solution, solve
 
 def create_data_model():
 
@@ -27,72 +28,19 @@ def create_data_model():
     data['depot'] = 0
     return data
 
-def print_solution(data, manager, routing, solution):
-    """Prints solution on console."""
-    total_distance = 0.0
-    total_cost = 0.0
-    cost_per_meter = 1.5
-    for vehicle_id in range(data['num_vehicles']):
-        index = routing.Start(vehicle_id)
-        plan_output = f'Vehicle {vehicle_id}\'s route: '
-        route_distance = 0.0
-        while not routing.IsEnd(index):
-            plan_output += f'{manager.IndexToNode(index)} -> '
-            previous_index = index
-            index = solution.Value(routing.NextVar(index))
-            route_distance += routing.GetArcCostForVehicle(previous_index, index, vehicle_id)
-        route_cost = route_distance * cost_per_meter
-        plan_output += f'{manager.IndexToNode(index)}'
-        plan_output += f'\nDistance of the route: {route_distance:.2f}m'
-        plan_output += f'\nCost of the route: £{route_cost:.2f}\n'
-        print(plan_output)
-        total_distance += route_distance
-        total_cost += route_cost
-    print(f'Total distance of all routes: {total_distance:.2f}m')
-    print(f'Total cost of all routes: £{total_cost:.2f}')
-
 def main():
 
     data = create_data_model()
-    manager = pywrapcp.RoutingIndexManager(len(data['distance_matrix']),
-                                           data['num_vehicles'], data['depot'])
-    routing = pywrapcp.RoutingModel(manager)
-
-
-    def distance_callback(from_index, to_index):
-
-        from_node = manager.IndexToNode(from_index)
-        to_node = manager.IndexToNode(to_index)
-        return data['distance_matrix'][from_node][to_node]
-
-    transit_callback_index = routing.RegisterTransitCallback(distance_callback)
-
-    routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
 
-
-    def demand_callback(from_index):
-
-        from_node = manager.IndexToNode(from_index)
-        return data['demands'][from_node]
-    demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
-
-    routing.AddDimensionWithVehicleCapacity(
-        demand_callback_index,
-        0,
-        data['vehicle_capacities'],
-        True,
-        'Capacity')
-
-    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
-    search_parameters.first_solution_strategy = (
-        routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC)
-
-    solution = routing.SolveWithParameters(search_parameters)
+    # 每米 1.5 的运输成本
+    solution = solve(data, objective=partial(distance_cost, rate=1.5),
+                     first_solution_strategy='PATH_CHEAPEST_ARC')
 
     if solution:
-        print_solution(data, manager, routing, solution)
+        print_solution(solution)
     else:
         print('No solution found !')
 
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
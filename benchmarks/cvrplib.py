@@ -0,0 +1,178 @@
+"""在 CVRPLIB 格式（Augerat A/P 集、X 集等）的实例上做可复现的基准测试。
+
+对每个实例、每个配置（首解策略/元启发式）和每个种子，在独立的子进程中以固定的
+时间（或解个数）预算求解一次，记录与已知最优值的差距、首个解的时间、峰值内存和
+每秒解的个数。结果写入 JSON 基线文件；给出 --compare 时与旧基线比较，差距变差时返回非零。
+
+已知最优值取自同名的 .sol 文件或 .vrp 的 COMMENT。benchmarks/instances 下只附带一个
+小样例（附最优解 .sol），标准实例集需另行下载到本地目录。benchmarks/baseline.json
+是该样例按解个数限制（--solution-limit 200 --seeds 0 1 2）得到的基线，与机器速度无关：
+
+    python -m benchmarks.cvrplib --solution-limit 200 --seeds 0 1 2 --compare benchmarks/baseline.json
+
+用法：python -m benchmarks.cvrplib DIR [--config PATH_CHEAPEST_ARC/GUIDED_LOCAL_SEARCH]
+      [--seeds 0 1 2] [--time-limit 10] [--baseline baseline.json] [--compare old.json]
+"""
+import argparse
+import json
+import resource
+import sys
+import time
+from multiprocessing import get_context
+from pathlib import Path
+
+from vrp.instances import read_vrp
+from vrp.portfolio import seed_parameters
+from vrp.solver import (build_model, extract_routes, make_solution, prepare_data,
+                        search_parameters, solve_model)
+from vrp.telemetry import SearchMonitor
+
+DEFAULT_DIR = Path(__file__).parent / 'instances'
+DEFAULT_CONFIG = 'PATH_CHEAPEST_ARC/GUIDED_LOCAL_SEARCH'
+
+
+def run(path, config, seed, time_limit, solution_limit=None):
+    """在当前进程中求解一个实例一次，返回结果字典。"""
+    instance = read_vrp(path)
+    data = prepare_data(instance)
+    strategy, _, metaheuristic = config.partition('/')
+    parameters = search_parameters(strategy, metaheuristic or None, time_limit)
+    seed_parameters(parameters, seed)
+    if solution_limit is not None:
+        parameters.solution_limit = solution_limit
+
+    start = time.perf_counter()
+    model = build_model(data)
+    monitor = SearchMonitor()
+    monitor.attach(model)
+    assignment = solve_model(model, parameters)
+    elapsed = time.perf_counter() - start
+
+    distance = None
+    if assignment:
+        routes = extract_routes(data, model.manager, model.routing, assignment)
+        distance = make_solution(data, routes).distance
+    best_known = instance.get('best_known')
+    gap = None
+    if distance is not None and best_known:
+        gap = (distance - best_known) / best_known
+    return {
+        'instance': instance['name'],
+        'nodes': len(data['demands']),
+        'config': config,
+        'seed': seed,
+        'time_limit': time_limit,
+        'solution_limit': solution_limit,
+        'distance': distance,
+        'best_known': best_known,
+        'gap': gap,
+        'time_to_first': monitor.events[0].elapsed if monitor.events else None,
+        'solutions': monitor.solutions,
+        'solutions_per_second': monitor.solutions / elapsed,
+        'elapsed': elapsed,
+        # Linux 上 ru_maxrss 的单位是 KB
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def _run(args):
+    return run(*args)
+
+
+def instance_paths(paths):
+    """展开目录，返回所有 .vrp 文件的路径。"""
+    found = []
+    for path in map(Path, paths):
+        found += sorted(path.glob('*.vrp')) if path.is_dir() else [path]
+    return found
+
+
+def benchmark(paths, configs, seeds, time_limit, solution_limit=None, workers=1):
+    """逐个运行 (实例, 配置, 种子)，每次运行使用一个新的子进程，返回结果列表。
+
+    workers 大于 1 时并行运行，但各次运行会互相争用 CPU，时间类指标不再可比。
+    """
+    tasks = [(str(path), config, seed, time_limit, solution_limit)
+             for path in instance_paths(paths) for config in configs for seed in seeds]
+    # spawn 的子进程不继承父进程的内存，峰值内存只反映本次求解
+    with get_context('spawn').Pool(workers, maxtasksperchild=1) as pool:
+        return pool.map(_run, tasks, chunksize=1)
+
+
+def _key(result):
+    return result['instance'], result['config'], result['seed']
+
+
+def compare(results, baseline, tolerance=0.005):
+    """与基线比较，返回变差的 (实例, 配置, 种子, 旧差距, 新差距) 列表。
+
+    差距比基线大 tolerance 以上、或基线有解而现在无解，都算变差。
+    """
+    old = {_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        previous = old.get(_key(result))
+        if previous is None or previous['distance'] is None:
+            continue
+        before = previous['gap'] if previous['gap'] is not None else previous['distance']
+        after = result['gap'] if result['gap'] is not None else result['distance']
+        if result['distance'] is None:
+            regressions.append(_key(result) + (before, None))
+        elif previous['gap'] is None:
+            if after > before * (1 + tolerance):
+                regressions.append(_key(result) + (before, after))
+        elif after > before + tolerance:
+            regressions.append(_key(result) + (before, after))
+    return regressions
+
+
+def print_results(results):
+    """打印结果表。"""
+    print(f'{"instance":<20}{"config":<42}{"seed":>5}{"distance":>11}{"gap":>8}'
+          f'{"first(s)":>10}{"sol/s":>9}{"rss(MB)":>9}')
+    for result in results:
+        distance = f'{result["distance"]:.0f}' if result['distance'] is not None else '-'
+        gap = f'{result["gap"]:.2%}' if result['gap'] is not None else '-'
+        first = f'{result["time_to_first"]:.3f}' if result['time_to_first'] is not None else '-'
+        print(f'{result["instance"]:<20}{result["config"]:<42}{result["seed"]:>5}{distance:>11}'
+              f'{gap:>8}{first:>10}{result["solutions_per_second"]:>9.1f}'
+              f'{result["peak_rss_mb"]:>9.1f}')
+    gaps = [result['gap'] for result in results if result['gap'] is not None]
+    if gaps:
+        print(f'mean gap {sum(gaps) / len(gaps):.2%} over {len(gaps)} runs')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*', default=[str(DEFAULT_DIR)],
+                        help='.vrp 文件或包含 .vrp 的目录')
+    parser.add_argument('--config', action='append', dest='configs',
+                        help='首解策略/元启发式，可重复给出')
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0])
+    parser.add_argument('--time-limit', type=float, default=10)
+    parser.add_argument('--solution-limit', type=int, default=None,
+                        help='按解的个数限制搜索，结果与机器速度无关')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--baseline', default=None, help='把结果写入该 JSON 文件')
+    parser.add_argument('--compare', default=None, help='与该 JSON 基线比较')
+    parser.add_argument('--tolerance', type=float, default=0.005)
+    args = parser.parse_args()
+
+    results = benchmark(args.paths, args.configs or [DEFAULT_CONFIG], args.seeds,
+                        args.time_limit, args.solution_limit, args.workers)
+    print_results(results)
+    if args.baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        for instance, config, seed, before, after in regressions:
+            print(f'REGRESSION {instance} {config} seed={seed}: {before} -> {after}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
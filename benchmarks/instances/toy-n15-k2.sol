@@ -0,0 +1,3 @@
+Route #1: 3 6 9 12 13 14 11 10
+Route #2: 2 5 8 7 4 1
+Cost 617
@@ -1,6 +1,4 @@
-from ortools.constraint_solver import routing_enums_pb2
-from ortools.constraint_solver import pywrapcp
-import numpy as np
+from vrp.solver import print_solution, solve, with_cost
 
 
 def create_data_model(distance_matrix, demands, vehicle_capacity):
@@ -14,50 +12,6 @@ def create_data_model(distance_matrix, demands, vehicle_capacity):
     return data_model
 
 
-def print_solution(data, manager, routing, solution):
-    """在控制台上打印解决方案。"""
-    total_distance = 0
-    total_transportation_cost = 0  # 总运输成本
-    for vehicle_id in range(data['num_vehicles']):
-        index = routing.Start(vehicle_id)
-        plan_output = f'Route for vehicle {vehicle_id}:\n'
-        route_distance = 0
-        route_transportation_cost = 0  # 当前车辆的运输成本
-        while not routing.IsEnd(index):
-            node_index = manager.IndexToNode(index)
-            plan_output += f' {node_index} -> '
-            previous_index = index
-            index = solution.Value(routing.NextVar(index))
-            if index == routing.Start(vehicle_id):
-                break
-            arc_distance = routing.GetArcCostForVehicle(previous_index, index, vehicle_id)
-            route_distance += arc_distance
-            # 计算当前节点的运输成本
-            demand = data['demands'][node_index]
-            transportation_cost = arc_distance * 1.5 * demand  # 每个货物每km1.5元
-            route_transportation_cost += transportation_cost
-        plan_output += f'{manager.IndexToNode(index)}\n'
-        plan_output += f'Distance of the route for vehicle {vehicle_id}: {route_distance}m\n'
-        plan_output += f'Transportation cost of the route for vehicle {vehicle_id}: {route_transportation_cost}元\n'
-        print(plan_output)
-        total_distance += route_distance
-        total_transportation_cost += route_transportation_cost
-    print(f'Total distance of all routes: {total_distance}m')
-    print(f'Total transportation cost: {total_transportation_cost}元')
-
-
-# 创建并注册转移回调
-def distance_callback(from_index, to_index,manager,data_model):
-    # Convert from routing variable Index to distance matrix NodeIndex.
-    from_node = manager.IndexToNode(from_index)
-    to_node = manager.IndexToNode(to_index)
-    return data_model['distance_matrix'][from_node][to_node]
-
-
-
-
-
-
 def main():
     """程序的入口点。"""
 
@@ -87,54 +41,13 @@ def main():
     # 创建数据模型
     data_model = create_data_model(distance_matrix, demands, vehicle_capacity)
 
-    # 创建路由索引管理器
-    manager = pywrapcp.RoutingIndexManager(len(data_model['distance_matrix']), data_model['num_vehicles'],
-                                           data_model['depot'])
-
-    # 创建路由模型
-    routing = pywrapcp.RoutingModel(manager)
-
-    # 创建并注册转移回调
-    transit_callback_index = routing.RegisterTransitCallback(
-        lambda from_index, to_index: distance_callback(from_index, to_index))
-
-    # 定义每条弧的成本
-    routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
-
-    # 添加车辆容量约束
-    def demand_callback(from_index):
-        """返回节点的需求量。"""
-        from_node = manager.IndexToNode(from_index)
-        return data_model['demands'][from_node]
-
-    demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
-    routing.AddDimensionWithVehicleCapacity(
-        demand_callback_index,
-        0,  # 车辆的初始容量为0
-        data_model['vehicle_capacity'],  # 车辆的最大容量
-        True,  # 从0开始计算累积量
-        'Capacity')
-
-    # 设置车辆的起始位置
-    for i in range(data_model['num_vehicles']):
-        routing.AddVariableMinimizedByFinalizer(
-            routing.GetDimensionOrDie('Capacity').CumulVar(routing.Start(i)))  # 设置目标为最小化总运输成本
-
-    # 设置搜索参数
-    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
-    search_parameters.first_solution_strategy = (
-        routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC)
-    # 设置局部搜索策略为Guided Local Search
-    search_parameters.local_search_metaheuristic = (
-        routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH)
-    search_parameters.time_limit.FromSeconds(30)  # 设置搜索时间限制为30秒
-
-    # 解决问题
-    solution = routing.SolveWithParameters(search_parameters)
+    # 以总距离为目标，设置局部搜索策略为Guided Local Search，搜索时间限制为30秒
+    solution = solve(data_model, first_solution_strategy='PATH_CHEAPEST_ARC',
+                     local_search_metaheuristic='GUIDED_LOCAL_SEARCH', time_limit=30)
 
-    # 在控制台上打印解决方案
+    # 在控制台上打印解决方案，并报告运输成本
     if solution:
-        print_solution(data_model, manager, routing, solution)
+        print_solution(with_cost(data_model, solution, 'demand_distance'))
 
 
 if __name__ == '__main__':
@@ -1,9 +1,4 @@
-import numpy as np
-
-def calculate_distance(point1, point2):
-    # 在这里编写距离计算方法，可以根据需要选择合适的距离度量方法
-    # 这里假设使用欧几里得距离计算方法
-    return np.sqrt((point1[0] - point2[0])**2 + (point1[1] - point2[1])**2)
+from vrp.validate import print_report, validate_matrix
 
 def main():
     # 输入节点坐标
@@ -32,14 +27,9 @@ def main():
         [19.8, 18.4, 17.0, 15.6, 14.1, 12.7, 11.3, 9.9, 8.5, 7.1, 5.7, 4.2, 2.8, 1.4, 0.0]
     ]
 
-    # 验证距离矩阵
-    for i in range(len(nodes)):
-        for j in range(len(nodes)):
-            expected_distance = calculate_distance(nodes[i], nodes[j])
-            if abs(distance_matrix[i][j] - expected_distance) > 1e-6:
-                print(f"距离矩阵错误：节点 {i} 到节点 {j} 的距离为 {distance_matrix[i][j]}，预期为 {expected_distance}")
-
-    print("距离矩阵验证完成")
+    # 验证距离矩阵（矩阵保留 1 位小数，按舍入误差比较）
+    report = validate_matrix(distance_matrix, nodes, decimals=1)
+    print_report(report)
 
 if __name__ == "__main__":
     main()
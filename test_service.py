@@ -0,0 +1,75 @@
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+from vrp.service import Client, Handler, SolverService
+
+
+def start_server(service):
+    # 在后台线程启动服务，端口由系统分配
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.service = service
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def expect_error(call, status):
+    # 请求应返回指定的 HTTP 错误码
+    try:
+        call()
+    except RuntimeError as error:
+        assert str(error).startswith(f'{status}:'), error
+        print(f'  {error}')
+    else:
+        raise AssertionError(f'应返回 {status}')
+
+
+def main():
+    instance = {
+        'coordinates': [(0, 0), (1, 1), (2, 2), (3, 3), (4, 4), (5, 5), (6, 6)],
+        'demands': [0, 3, 4, 2, 5, 3, 4],
+        'vehicle_capacities': [10, 10, 10],
+        'name': 'smoke',
+    }
+
+    service = SolverService(max_workers=1, default_time_limit=1)
+    server = start_server(service)
+    client = Client(f'127.0.0.1:{server.server_address[1]}', timeout=60)
+    try:
+        # 正常求解
+        result = client.solve(instance, time_limit=1)
+        assert result['solution'] is not None, result
+        print('solve:', result['solution']['distance'], 'model_cached =', result['model_cached'])
+
+        # 同一实例再次求解，工作进程复用已建好的模型
+        result = client.solve(instance_id=result['instance_id'], time_limit=1)
+        assert result['model_cached'], result
+        print('cached solve:', result['solution']['distance'])
+
+        # 没有 time_limit 和 deadline 的元启发式按默认时间限制结束
+        start = time.monotonic()
+        result = client.solve(instance_id=result['instance_id'],
+                              local_search_metaheuristic='GUIDED_LOCAL_SEARCH')
+        assert result['time_limit'] == 1 and time.monotonic() - start < 10, result
+        print('default time limit:', result['time_limit'])
+
+        # 错误的请求
+        print('errors:')
+        expect_error(lambda: client.solve(instance, first_solution_strategy='FOO'), 400)
+        expect_error(lambda: client.solve(instance, local_search_metaheuristic='FOO'), 400)
+        expect_error(lambda: client.solve(instance, objective='FOO'), 400)
+        expect_error(lambda: client.solve(instance_id='missing'), 400)
+        expect_error(lambda: client.solve({'demands': [0, 1]}), 400)
+
+        metrics = client.metrics()
+        assert metrics['solved'] == 3, metrics
+        print('metrics:', metrics)
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
+    print('OK')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""车辆路径问题（CVRP）求解的公共模块。"""
@@ -0,0 +1,121 @@
+"""asyncio 接口：可取消、带截止时间的求解。
+
+    token = CancelToken()
+    task = asyncio.create_task(solve_async(data, deadline=5, token=token))
+    ...
+    token.cancel()          # 新请求取代了旧请求
+    solution = await task   # 立即返回目前为止最好的解
+
+取消标志放在一个字节的共享内存里，由 AddAtSolutionCallback 在每个新解时检查，
+置位或到达截止时间后调用 CancelSearch，求解器返回当前最好的解。
+注意 SolveWithParameters 在求解期间不释放 GIL，放在线程里会卡住事件循环，
+所以默认在进程池中求解；传入 ThreadPoolExecutor 也可以工作，但只适合很短的求解。
+取消只在出现新解时生效，time_limit 同时被截到截止时间，保证最迟按时返回。
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+from vrp.solver import solve
+
+_executor = None
+
+
+class CancelToken:
+    """跨进程的取消标志。用完后调用 close（solve_async 会自动关闭自己创建的标志）。"""
+
+    def __init__(self):
+        # 子进程附加共享内存时要与主进程共用 resource_tracker，否则会误报泄漏
+        resource_tracker.ensure_running()
+        self._shm = SharedMemory(create=True, size=1)
+        self._shm.buf[0] = 0
+        self.name = self._shm.name
+
+    def cancel(self):
+        self._shm.buf[0] = 1
+
+    @property
+    def cancelled(self):
+        return bool(self._shm.buf[0])
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+
+class CancelMonitor:
+    """在每个新解时检查取消标志和截止时间，传给 solve(..., monitor=...) 使用。"""
+
+    def __init__(self, token_name, deadline=None):
+        self.token_name = token_name
+        self.deadline = deadline
+        self.cancelled = False
+        self.shm = None
+
+    def attach(self, model):
+        routing = model.routing
+        self.shm = SharedMemory(name=self.token_name)
+        flag = self.shm.buf
+
+        def at_solution():
+            if flag[0] or (self.deadline is not None and time.time() >= self.deadline):
+                self.cancelled = True
+                routing.CancelSearch()
+
+        routing.AddAtSolutionCallback(at_solution)
+
+    def close(self):
+        if self.shm is not None:
+            self.shm.close()
+
+
+def _solve_until(data, token_name, deadline, options):
+    monitor = CancelMonitor(token_name, deadline)
+    if deadline is not None:
+        remaining = max(deadline - time.time(), 0.001)
+        time_limit = options.get('time_limit')
+        options = dict(options, time_limit=min(time_limit or remaining, remaining))
+    try:
+        return solve(data, monitor=monitor, **options)
+    finally:
+        monitor.close()
+
+
+def default_executor():
+    """solve_async 默认使用的进程池（首次调用时创建）。"""
+    global _executor
+    if _executor is None:
+        resource_tracker.ensure_running()
+        _executor = ProcessPoolExecutor(os.cpu_count())
+    return _executor
+
+
+async def solve_async(data, deadline=None, token=None, executor=None, **options):
+    """在执行器中求解，返回 Solution（没有可行解时为 None）。
+
+    deadline 为从现在起的秒数，到期时返回当前最好的解；token.cancel() 同样提前返回。
+    任务本身被取消（task.cancel()）时会通知求解进程停止，并向上抛出 CancelledError。
+    options 原样传给 vrp.solver.solve。
+    """
+    own_token = token is None
+    if own_token:
+        token = CancelToken()
+    expires = time.time() + deadline if deadline is not None else None
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(executor or default_executor(), _solve_until,
+                                  data, token.name, expires, options)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        token.cancel()
+        raise
+    finally:
+        if own_token:
+            if not future.done():
+                # 等求解进程看到取消标志并退出后再释放共享内存
+                future.add_done_callback(lambda _: token.close())
+            else:
+                token.close()
@@ -0,0 +1,164 @@
+"""批量求解互不相关的 CVRP 实例（每个仓库每天一个）。
+
+实例由 vrp.instances 从 JSONL / CSV / NPZ 文件或目录中逐个读取，每个实例包含
+'distance_matrix' 或 'coordinates'、'demands'、'vehicle_capacities'（可选 'name'、'depot'）。
+距离矩阵放在共享内存中交给子进程（或由子进程映射 vrp.store 中的缓存文件），
+每个子进程绑定一个 CPU 核，结果按完成顺序返回。
+
+用法：python -m vrp.batch instances.jsonl --time-limit 10 --workers 8 [--store DIR]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from vrp.distance import distance_matrix
+from vrp.instances import iter_instances
+from vrp.solver import solve
+from vrp.store import MatrixStore
+
+
+def _share_matrix(instance):
+    """把实例的距离矩阵写入共享内存，返回 (共享内存, 形状)。"""
+    if 'distance_matrix' in instance:
+        matrix = np.asarray(instance['distance_matrix'], dtype=np.float64)
+        shape = matrix.shape
+    else:
+        matrix = None
+        shape = (len(instance['coordinates']),) * 2
+    shm = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+    shared = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    if matrix is None:
+        distance_matrix(instance['coordinates'], out=shared)
+    else:
+        shared[:] = matrix
+    del shared
+    return shm, shape
+
+
+def _pin_worker(cores):
+    # 每个子进程占用一个 CPU 核，避免求解器之间互相抢占
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {cores.get()})
+
+
+def _solve_shared(name, shm_name, shape, data, options):
+    shm = SharedMemory(name=shm_name)
+    matrix = None
+    try:
+        matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        solution = solve(dict(data, distance_matrix=matrix), **options)
+    finally:
+        # 先释放缓冲区上的视图，否则 close 抛出 BufferError，掩盖求解器的异常
+        matrix = None
+        shm.close()
+    return name, solution
+
+
+def _solve_stored(name, path, coordinates, data, options):
+    # 主进程给出的缓存文件可能在子进程打开前被预算淘汰，这时直接重新计算
+    try:
+        matrix = np.load(path, mmap_mode='r')
+    except FileNotFoundError:
+        matrix = distance_matrix(coordinates)
+    return name, solve(dict(data, distance_matrix=matrix), **options)
+
+
+def _release(shm):
+    if shm is not None:
+        shm.close()
+        shm.unlink()
+
+
+def solve_batch(instances, max_workers=None, store=None, **options):
+    """并行求解多个实例，按完成顺序产出 (name, solution)。
+
+    给出 store（MatrixStore）时，由坐标给出的实例从磁盘缓存映射距离矩阵，
+    否则通过共享内存传给子进程。options 原样传给 vrp.solver.solve，例如 time_limit、objective。
+    """
+    max_workers = max_workers or os.cpu_count()
+    context = get_context()
+    cores = context.Queue()
+    available = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else []
+    for worker in range(max_workers):
+        if available:
+            cores.put(available[worker % len(available)])
+
+    # 子进程要与主进程共用同一个 resource_tracker，否则它们附加的共享内存会被误报为泄漏
+    resource_tracker.ensure_running()
+
+    instances = iter(instances)
+    pending = {}
+    initializer = _pin_worker if available else None
+    with ProcessPoolExecutor(max_workers, context, initializer, (cores,)) as executor:
+        try:
+            while True:
+                # 同时在途的实例数有限，避免一次性为所有实例分配共享内存
+                for instance in instances:
+                    data = {key: value for key, value in instance.items()
+                            if key not in ('distance_matrix', 'coordinates', 'name')}
+                    if store is not None and 'coordinates' in instance:
+                        shm = None
+                        path = store.get(instance['coordinates']).filename
+                        future = executor.submit(
+                            _solve_stored, instance['name'], path, instance['coordinates'],
+                            data, options)
+                    else:
+                        shm, shape = _share_matrix(instance)
+                        future = executor.submit(
+                            _solve_shared, instance['name'], shm.name, shape, data, options)
+                    pending[future] = shm
+                    if len(pending) >= 2 * max_workers:
+                        break
+                if not pending:
+                    return
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    _release(pending.pop(future))
+                    yield future.result()
+        finally:
+            for shm in pending.values():
+                _release(shm)
+
+
+def solution_to_dict(name, solution):
+    """把结果转换为可写入 JSON 的字典。"""
+    if solution is None:
+        return {'name': name, 'solution': None}
+    result = solution._asdict()
+    result['routes'] = [route._asdict() for route in solution.routes]
+    return {'name': name, 'solution': result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量求解 CVRP 实例')
+    parser.add_argument('path', help='JSONL / CSV / NPZ 实例文件或目录')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--time-limit', type=float, default=10)
+    parser.add_argument('--objective', default='distance')
+    parser.add_argument('--metaheuristic', default='GUIDED_LOCAL_SEARCH')
+    parser.add_argument('--store', default=None, help='距离矩阵缓存目录')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = 0
+    store = MatrixStore(args.store) if args.store else None
+    results = solve_batch(iter_instances(args.path), args.workers, store,
+                          objective=args.objective, time_limit=args.time_limit,
+                          local_search_metaheuristic=args.metaheuristic)
+    for name, solution in results:
+        count += 1
+        print(json.dumps(solution_to_dict(name, solution), ensure_ascii=False), flush=True)
+    elapsed = time.perf_counter() - start
+    print(f'Solved {count} instances in {elapsed:.1f}s '
+          f'({count / elapsed * 60:.1f} instances/min)', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
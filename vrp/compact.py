@@ -0,0 +1,244 @@
+"""紧凑的实例与解：__slots__ 类，数据放在连续的 NumPy 数组中。
+
+Instance 可以直接代替 data 字典传给 vrp 的各个函数（实现了只读的映射接口），
+距离矩阵可以用 float32 存放，内存是 Python 嵌套列表的几十分之一。
+PackedSolution 把所有路线拼成一个节点数组加偏移量（CSR），便于在进程间传递。
+
+两者都可以打包进一个连续的缓冲区（to_bytes / pack_into），并用 from_buffer
+从 bytes、共享内存或 mmap 中零拷贝地还原：数组直接是缓冲区上的视图。
+"""
+import json
+import struct
+
+import numpy as np
+
+from vrp.model import vehicle_capacities
+from vrp.solver import Route, Solution
+
+MAGIC = b'VRP1'
+# 数组在缓冲区中的对齐字节数
+ALIGN = 64
+_PREFIX = struct.Struct('<4sI')
+
+
+def _align(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+def packed_size(header, arrays):
+    """打包后的字节数。"""
+    _, size = _layout(header, arrays)
+    return size
+
+
+def _layout(header, arrays):
+    # 先排好每个数组的偏移，再把偏移写入头部
+    specs = {name: [array.dtype.str, list(array.shape), 0] for name, array in arrays.items()}
+    text = json.dumps(dict(header, arrays=specs)).encode()
+    # 偏移量写入头部会让头部变长，预留足够的位数后再计算
+    offset = _align(_PREFIX.size + len(text) + 20 * len(specs))
+    for name, array in arrays.items():
+        specs[name][2] = offset
+        offset = _align(offset + array.nbytes)
+    text = json.dumps(dict(header, arrays=specs)).encode()
+    return text, offset
+
+
+def pack_into(buffer, header, arrays):
+    """把头部（JSON）和数组写入支持缓冲区协议的可写对象，返回写入的字节数。"""
+    text, size = _layout(header, arrays)
+    view = memoryview(buffer).cast('B')
+    if len(view) < size:
+        raise ValueError(f'缓冲区至少需要 {size} 字节，实际只有 {len(view)} 字节')
+    _PREFIX.pack_into(view, 0, MAGIC, len(text))
+    view[_PREFIX.size:_PREFIX.size + len(text)] = text
+    specs = json.loads(text)['arrays']
+    for name, array in arrays.items():
+        offset = specs[name][2]
+        target = np.ndarray(array.shape, array.dtype, buffer=view, offset=offset)
+        target[...] = array
+    return size
+
+
+def unpack(buffer):
+    """从缓冲区还原 (头部, {名称: 数组视图})，不复制数据。"""
+    view = memoryview(buffer).cast('B')
+    magic, length = _PREFIX.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise ValueError('不是 vrp.compact 打包的数据')
+    header = json.loads(bytes(view[_PREFIX.size:_PREFIX.size + length]))
+    arrays = {name: np.ndarray(tuple(shape), np.dtype(dtype), buffer=view, offset=offset)
+              for name, (dtype, shape, offset) in header.pop('arrays').items()}
+    return header, arrays
+
+
+class Instance:
+    """CVRP 实例。数组是连续的 NumPy 数组，可以像 data 字典一样按键读取。
+
+    dtype=np.float32 时距离矩阵的内存减半，但距离会有约 1e-7 的相对误差。
+    """
+
+    __slots__ = ('distance_matrix', 'demands', 'vehicle_capacities', 'depot', 'name',
+                 'coordinates')
+
+    def __init__(self, distance_matrix, demands, vehicle_capacities, depot=0, name=None,
+                 coordinates=None, dtype=np.float64):
+        self.distance_matrix = np.ascontiguousarray(distance_matrix, dtype=dtype)
+        self.demands = np.ascontiguousarray(demands, dtype=np.int64)
+        self.vehicle_capacities = np.ascontiguousarray(vehicle_capacities, dtype=np.int64)
+        self.depot = int(depot)
+        self.name = name
+        self.coordinates = (None if coordinates is None
+                            else np.ascontiguousarray(coordinates, dtype=np.float64))
+        num_nodes = len(self.demands)
+        if self.distance_matrix.shape != (num_nodes, num_nodes):
+            raise ValueError(f'距离矩阵的形状应为 {(num_nodes, num_nodes)}，'
+                             f'实际为 {self.distance_matrix.shape}')
+
+    @classmethod
+    def from_data(cls, data, dtype=np.float64):
+        """由 data 字典（兼容 'vehicle_capacity' 键名）创建实例。"""
+        return cls(data['distance_matrix'], data['demands'], vehicle_capacities(data),
+                   data.get('depot', 0), data.get('name'), data.get('coordinates'), dtype)
+
+    @property
+    def num_vehicles(self):
+        return len(self.vehicle_capacities)
+
+    @property
+    def nbytes(self):
+        arrays = self._arrays()
+        return sum(array.nbytes for array in arrays.values())
+
+    # 只读的映射接口，使 Instance 可以代替 data 字典
+    def keys(self):
+        keys = ['distance_matrix', 'demands', 'vehicle_capacities', 'num_vehicles', 'depot']
+        return keys + [key for key in ('name', 'coordinates') if getattr(self, key) is not None]
+
+    def __getitem__(self, key):
+        if key not in self.keys():
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def _arrays(self):
+        arrays = {'distance_matrix': self.distance_matrix, 'demands': self.demands,
+                  'vehicle_capacities': self.vehicle_capacities}
+        if self.coordinates is not None:
+            arrays['coordinates'] = self.coordinates
+        return arrays
+
+    def _header(self):
+        return {'type': 'instance', 'depot': self.depot, 'name': self.name}
+
+    def packed_size(self):
+        return packed_size(self._header(), self._arrays())
+
+    def pack_into(self, buffer):
+        """写入可写缓冲区（例如共享内存的 buf），返回写入的字节数。"""
+        return pack_into(buffer, self._header(), self._arrays())
+
+    def to_bytes(self):
+        """打包为 bytearray（不再额外复制成 bytes）。"""
+        buffer = bytearray(self.packed_size())
+        self.pack_into(buffer)
+        return buffer
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        """从打包的缓冲区还原，数组是缓冲区上的视图（不复制）。"""
+        header, arrays = unpack(buffer)
+        instance = cls.__new__(cls)
+        instance.distance_matrix = arrays['distance_matrix']
+        instance.demands = arrays['demands']
+        instance.vehicle_capacities = arrays['vehicle_capacities']
+        instance.coordinates = arrays.get('coordinates')
+        instance.depot = header['depot']
+        instance.name = header['name']
+        return instance
+
+    def __reduce__(self):
+        return Instance.from_buffer, (self.to_bytes(),)
+
+    def __repr__(self):
+        return (f'Instance(name={self.name!r}, nodes={len(self.demands)}, '
+                f'vehicles={self.num_vehicles}, dtype={self.distance_matrix.dtype})')
+
+
+class PackedSolution:
+    """所有路线拼接成一个节点数组，第 i 条路线为 nodes[offsets[i]:offsets[i + 1]]。"""
+
+    __slots__ = ('nodes', 'offsets', 'distance', 'load', 'cost', 'objective')
+
+    def __init__(self, nodes, offsets, distance, load, cost, objective=None):
+        self.nodes = np.ascontiguousarray(nodes, dtype=np.int64)
+        self.offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+        self.distance = np.ascontiguousarray(distance, dtype=np.float64)
+        self.load = np.ascontiguousarray(load, dtype=np.int64)
+        self.cost = np.ascontiguousarray(cost, dtype=np.float64)
+        self.objective = objective
+
+    @classmethod
+    def from_solution(cls, solution):
+        """由 vrp.solver.Solution 转换。"""
+        routes = solution.routes
+        lengths = [len(route.nodes) for route in routes]
+        nodes = np.concatenate([route.nodes for route in routes]) if routes else []
+        return cls(nodes, np.concatenate(([0], np.cumsum(lengths))),
+                   [route.distance for route in routes], [route.load for route in routes],
+                   [route.cost for route in routes], solution.objective)
+
+    def to_solution(self):
+        """转换回 vrp.solver.Solution。"""
+        routes = [Route(vehicle_id, nodes.tolist(), float(self.distance[vehicle_id]),
+                        int(self.load[vehicle_id]), float(self.cost[vehicle_id]))
+                  for vehicle_id, nodes in enumerate(self.routes)]
+        return Solution(routes, float(self.distance.sum()), float(self.cost.sum()),
+                        self.objective)
+
+    @property
+    def routes(self):
+        """每条路线的节点数组（视图）。"""
+        return np.split(self.nodes, self.offsets[1:-1])
+
+    def _arrays(self):
+        return {name: getattr(self, name)
+                for name in ('nodes', 'offsets', 'distance', 'load', 'cost')}
+
+    def _header(self):
+        return {'type': 'solution', 'objective': self.objective}
+
+    def packed_size(self):
+        return packed_size(self._header(), self._arrays())
+
+    def pack_into(self, buffer):
+        return pack_into(buffer, self._header(), self._arrays())
+
+    def to_bytes(self):
+        """打包为 bytearray（不再额外复制成 bytes）。"""
+        buffer = bytearray(self.packed_size())
+        self.pack_into(buffer)
+        return buffer
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        header, arrays = unpack(buffer)
+        solution = cls.__new__(cls)
+        for name, array in arrays.items():
+            setattr(solution, name, array)
+        solution.objective = header['objective']
+        return solution
+
+    def __reduce__(self):
+        return PackedSolution.from_buffer, (self.to_bytes(),)
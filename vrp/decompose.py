@@ -0,0 +1,341 @@
+"""大规模实例的先聚类后路由（cluster-first route-second）分解。
+
+把客户分成载重均衡的若干簇（扫描法、坐标 k-means 或基于距离矩阵的 k-medoids），
+每个簇带着分到的车辆作为独立的子 VRP，在进程池中并行用 vrp.solver 求解，
+最后把相邻的两簇合成一个子问题，从边界上的客户出发做局部搜索修复边界。
+子问题规模固定，总耗时随客户数近似线性增长。
+
+有坐标时不需要完整的距离矩阵：每个子问题的矩阵按簇从坐标计算，边界用坐标的
+k 近邻判断，内存只与簇的大小有关；只有距离矩阵时从中取出每簇的子矩阵。
+"""
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from vrp.distance import as_coordinates, distance_matrix
+from vrp.fleet import first_fit_decreasing
+from vrp.local_search import improve, nearest_neighbors
+from vrp.model import VEHICLE_KEYS, vehicle_capacities
+from vrp.solver import Solution, make_solution, solve
+from vrp.sparse import knn_graph
+
+METHODS = ('sweep', 'kmeans', 'kmedoids')
+
+
+def _customers(num_nodes, depot):
+    return np.delete(np.arange(num_nodes), depot)
+
+
+def sweep_clusters(coords, demands, depot, num_clusters):
+    """扫描法：按相对仓库的极角排序，按累计载重均分成 num_clusters 段。
+
+    从最大的角度空隙处开始扫描，避免把一片自然连在一起的客户切开。
+    返回每个节点的簇编号，仓库为 -1。
+    """
+    coords = as_coordinates(coords)
+    demands = np.asarray(demands, dtype=np.float64)
+    customers = _customers(len(coords), depot)
+    offset = coords[customers] - coords[depot]
+    angles = np.arctan2(offset[:, 1], offset[:, 0])
+    order = np.argsort(angles, kind='stable')
+    gaps = np.diff(np.append(angles[order], angles[order[0]] + 2 * np.pi))
+    order = np.roll(order, -(int(np.argmax(gaps)) + 1))
+    weights = demands[customers][order]
+    total = weights.sum()
+    if total <= 0:
+        weights, total = np.ones(len(order)), float(len(order))
+    middle = np.cumsum(weights) - weights / 2
+    labels = np.full(len(coords), -1, dtype=np.int64)
+    labels[customers[order]] = np.minimum(middle * num_clusters // total, num_clusters - 1)
+    return labels
+
+
+def balanced_assign(costs, demands, limit):
+    """在每簇载重不超过 limit 的前提下把客户分给代价最小的簇。
+
+    costs 形状为 (客户数, 簇数)；按后悔值（次优与最优代价之差）从大到小依次分配，
+    所有簇都放不下时分给当前载重最小的簇。返回每个客户的簇编号。
+    """
+    num_points, num_clusters = costs.shape
+    preference = np.argsort(costs, axis=1)
+    if num_clusters > 1:
+        ranked = np.take_along_axis(costs, preference[:, :2], axis=1)
+        order = np.argsort(ranked[:, 0] - ranked[:, 1], kind='stable')
+    else:
+        order = np.arange(num_points)
+    load = np.zeros(num_clusters)
+    labels = np.empty(num_points, dtype=np.int64)
+    for point in order.tolist():
+        demand = demands[point]
+        fits = load[preference[point]] + demand <= limit
+        cluster = preference[point][np.argmax(fits)] if fits.any() else int(np.argmin(load))
+        labels[point] = cluster
+        load[cluster] += demand
+    return labels
+
+
+def _limit(demands, num_clusters, slack):
+    return max(demands.sum() / num_clusters * (1 + slack), demands.max(initial=0))
+
+
+def kmeans_clusters(coords, demands, depot, num_clusters, iterations=20, slack=0.1, seed=0):
+    """以载重为权重的坐标 k-means，最后一步按容量均衡分配。返回每个节点的簇编号。"""
+    coords = as_coordinates(coords)
+    demands = np.asarray(demands, dtype=np.float64)
+    customers = _customers(len(coords), depot)
+    points, weights = coords[customers], demands[customers] + 1e-9
+    rng = np.random.default_rng(seed)
+    centers = points[rng.choice(len(points), num_clusters, replace=False)]
+    for _ in range(iterations):
+        costs = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        nearest = costs.argmin(axis=1)
+        mass = np.bincount(nearest, weights, num_clusters)
+        moved = np.empty_like(centers)
+        for axis in range(2):
+            moved[:, axis] = np.bincount(nearest, weights * points[:, axis], num_clusters)
+        empty = mass == 0
+        moved[~empty] /= mass[~empty, None]
+        moved[empty] = centers[empty]
+        if np.allclose(moved, centers):
+            break
+        centers = moved
+    costs = np.sqrt(((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2))
+    labels = np.full(len(coords), -1, dtype=np.int64)
+    labels[customers] = balanced_assign(costs, demands[customers],
+                                        _limit(demands[customers], num_clusters, slack))
+    return labels
+
+
+def kmedoids_clusters(matrix, demands, depot, num_clusters, iterations=10, slack=0.1, seed=0):
+    """基于距离矩阵的容量均衡 k-medoids，不需要坐标。返回每个节点的簇编号。
+
+    初始中心用最远点法选取；每轮先按容量均衡分配，再把每簇的中心换成
+    到簇内其他客户距离和最小的客户。距离取两个方向的平均值，每次只读取
+    到中心的几列或簇内的子矩阵，不复制整个矩阵。
+    """
+    matrix = np.asarray(matrix)
+    demands = np.asarray(demands, dtype=np.float64)
+    customers = _customers(len(matrix), depot)
+    weights = demands[customers]
+    limit = _limit(weights, num_clusters, slack)
+
+    def to_nodes(nodes):
+        # 所有客户到 nodes 的对称化距离，形状为 (客户数, len(nodes))
+        return (matrix[np.ix_(customers, nodes)] + matrix[np.ix_(nodes, customers)].T) / 2
+
+    rng = np.random.default_rng(seed)
+    medoids = [int(rng.integers(len(customers)))]
+    nearest = to_nodes(customers[medoids])[:, 0]
+    for _ in range(num_clusters - 1):
+        medoids.append(int(np.argmax(nearest)))
+        np.minimum(nearest, to_nodes(customers[medoids[-1:]])[:, 0], out=nearest)
+    medoids = np.array(medoids)
+
+    for _ in range(iterations):
+        labels = balanced_assign(to_nodes(customers[medoids]), weights, limit)
+        moved = medoids.copy()
+        for cluster in range(num_clusters):
+            members = np.flatnonzero(labels == cluster)
+            if len(members):
+                block = matrix[np.ix_(customers[members], customers[members])]
+                moved[cluster] = members[(block.sum(axis=0) + block.sum(axis=1)).argmin()]
+        if np.array_equal(moved, medoids):
+            break
+        medoids = moved
+    result = np.full(len(matrix), -1, dtype=np.int64)
+    result[customers] = balanced_assign(to_nodes(customers[medoids]), weights, limit)
+    return result
+
+
+def cluster(data, method='sweep', coordinates=None, num_clusters=None, cluster_size=200, **options):
+    """按 method 聚类，返回每个节点的簇编号（仓库为 -1）。
+
+    sweep 和 kmeans 需要坐标（coordinates 或 data['coordinates']），
+    kmedoids 只用距离矩阵；num_clusters 默认按每簇 cluster_size 个客户估算。
+    """
+    if coordinates is None:
+        coordinates = data.get('coordinates')
+    demands = np.asarray(data['demands'], dtype=np.int64)
+    depot = data.get('depot', 0)
+    num_nodes = len(demands)
+    if num_clusters is None:
+        num_clusters = math.ceil((num_nodes - 1) / cluster_size)
+    num_clusters = max(1, min(num_clusters, num_nodes - 1))
+    if method == 'kmedoids':
+        if data.get('distance_matrix') is None:
+            raise ValueError('kmedoids 聚类需要距离矩阵')
+        return kmedoids_clusters(data['distance_matrix'], demands, depot, num_clusters, **options)
+    if coordinates is None:
+        raise ValueError(f'{method} 聚类需要节点坐标，没有坐标时请用 kmedoids')
+    if method == 'sweep':
+        return sweep_clusters(coordinates, demands, depot, num_clusters)
+    if method == 'kmeans':
+        return kmeans_clusters(coordinates, demands, depot, num_clusters, **options)
+    raise ValueError(f'未知的聚类方法：{method}，可选 {", ".join(METHODS)}')
+
+
+def split_fleet(data, labels):
+    """把车辆分给各簇，返回每簇的车辆编号列表，车不够时返回 None。
+
+    每簇先按最小的车辆容量用 FFD 估算所需车辆数（有客户的簇至少一辆），
+    剩余车辆按簇的载重比例分配；容量大的车优先分给编号小的簇。
+    """
+    capacities = np.asarray(vehicle_capacities(data), dtype=np.int64)
+    demands = np.asarray(data['demands'], dtype=np.int64)
+    num_clusters = int(labels.max()) + 1
+    loads = np.bincount(labels[labels >= 0], demands[labels >= 0], num_clusters)
+    sizes = np.bincount(labels[labels >= 0], minlength=num_clusters)
+    needs = np.array([len(first_fit_decreasing(demands[labels == c], capacities.min()))
+                      for c in range(num_clusters)], dtype=np.int64)
+    needs = np.maximum(needs, sizes > 0)
+    spare = len(capacities) - needs.sum()
+    if spare < 0:
+        return None
+    share = spare * loads / max(loads.sum(), 1)
+    counts = needs + np.floor(share).astype(np.int64)
+    remainder = len(capacities) - counts.sum()
+    counts[np.argsort(-(share - np.floor(share)), kind='stable')[:remainder]] += 1
+    vehicles = np.argsort(-capacities, kind='stable')
+    return np.split(vehicles, np.cumsum(counts)[:-1])
+
+
+def _sub_instance(data, nodes, vehicles, coordinates=None):
+    # 子问题：仓库固定为 0，节点顺序为 nodes；没有距离矩阵时只计算这些节点之间的距离
+    if data.get('distance_matrix') is not None:
+        matrix = data['distance_matrix'][np.ix_(nodes, nodes)]
+    else:
+        matrix = distance_matrix(coordinates[nodes])
+    capacities = vehicle_capacities(data)
+    sub = {
+        'distance_matrix': matrix,
+        'demands': np.asarray(data['demands'], dtype=np.int64)[nodes],
+        'vehicle_capacities': [int(capacities[v]) for v in vehicles],
+        'num_vehicles': len(vehicles),
+        'depot': 0,
+    }
+    sub.update((key, np.asarray(data[key])[vehicles]) for key in VEHICLE_KEYS
+               if data.get(key) is not None)
+    return sub
+
+
+def _solve_cluster(sub, options):
+    return solve(sub, **options)
+
+
+def _neighbors(data, k, coordinates=None):
+    # 每个节点的 k 个近邻：有坐标时用网格索引，否则分块读取距离矩阵
+    if coordinates is not None:
+        return knn_graph(coordinates, k)[0]
+    return nearest_neighbors(data['distance_matrix'], k, data.get('depot', 0))
+
+
+def _crossing(labels, neighbors):
+    # 近邻属于另一个簇的 (客户, 近邻) 对，仓库不算
+    customers = np.flatnonzero(labels >= 0)
+    other = labels[neighbors[customers]]
+    crossing = (other >= 0) & (other != labels[customers, None])
+    rows, columns = np.nonzero(crossing)
+    return customers[rows], neighbors[customers[rows], columns]
+
+
+def boundary_nodes(data, labels, k=10, coordinates=None):
+    """近邻中有其他簇客户的客户，即需要跨簇修复的边界。
+
+    有坐标时按坐标求近邻，不需要距离矩阵。
+    """
+    if coordinates is None:
+        coordinates = data.get('coordinates')
+    nodes, _ = _crossing(labels, _neighbors(data, k, coordinates))
+    return np.unique(nodes)
+
+
+def _members(routes, vehicles, depot):
+    # 这些车辆服务的客户，前面加上仓库
+    customers = [node for v in vehicles for node in routes[v][1:-1]]
+    return np.array([depot] + customers, dtype=np.int64)
+
+
+def _local_routes(routes, vehicles, nodes):
+    local = {node: i for i, node in enumerate(nodes.tolist())}
+    return [[local[node] for node in routes[v]] for v in vehicles]
+
+
+def _repair(data, routes, labels, fleet, objective, k, coordinates=None):
+    # 相邻的两簇合成一个子问题，从边界客户出发做局部搜索；同时只有两簇大小的子矩阵
+    depot = data.get('depot', 0)
+    sources, targets = _crossing(labels, _neighbors(data, k, coordinates))
+    boundary = set(sources.tolist())
+    pairs = np.unique(np.sort(np.stack([labels[sources], labels[targets]], axis=1), axis=1),
+                      axis=0)
+    for a, b in pairs.tolist():
+        vehicles = np.concatenate([fleet[a], fleet[b]])
+        nodes = _members(routes, vehicles, depot)
+        sub = _sub_instance(data, nodes, vehicles, coordinates)
+        start = [i for i, node in enumerate(nodes.tolist()) if node in boundary]
+        improved = improve(sub, _local_routes(routes, vehicles, nodes), objective, k,
+                           start_nodes=start)
+        for v, route in zip(vehicles.tolist(), improved):
+            routes[v] = nodes[route].tolist()
+    return routes
+
+
+def solve_decomposed(data, method='sweep', coordinates=None, num_clusters=None, cluster_size=200,
+                     max_workers=None, time_limit=5, objective='distance', repair=True, k=10,
+                     **options):
+    """先聚类后路由求解，返回 Solution，有簇无解或车辆不够时返回 None。
+
+    data 可以只有坐标（data['coordinates'] 或 coordinates）而没有距离矩阵，
+    这时各子问题的距离按簇从坐标计算（与 vrp.distance.distance_matrix 相同）。
+    options 原样传给每个子问题的 vrp.solver.solve；time_limit 是每个子问题的时限。
+    repair 为真时，对相邻的两簇从边界客户出发用 vrp.local_search 做
+    relocate/swap/2-opt* 修复。
+    """
+    if coordinates is None:
+        coordinates = data.get('coordinates')
+    if coordinates is not None:
+        coordinates = as_coordinates(coordinates)
+    if data.get('distance_matrix') is not None:
+        # 有距离矩阵时以它为准，坐标只用于聚类和求近邻
+        data = dict(data, distance_matrix=np.asarray(data['distance_matrix']))
+    elif coordinates is None:
+        raise ValueError('需要距离矩阵或节点坐标')
+    labels = cluster(data, method, coordinates, num_clusters, cluster_size)
+    fleet = split_fleet(data, labels)
+    if fleet is None:
+        return None
+    depot = data.get('depot', 0)
+    options = dict(options, time_limit=time_limit, objective=objective)
+
+    routes = [[depot, depot] for _ in vehicle_capacities(data)]
+    members = [np.concatenate(([depot], np.flatnonzero(labels == c))) for c in range(len(fleet))]
+    with ProcessPoolExecutor(max_workers or os.cpu_count()) as executor:
+        # 没有客户的簇不分车，也不用求解
+        futures = [executor.submit(_solve_cluster, _sub_instance(data, nodes, vehicles, coordinates),
+                                   options) if len(nodes) > 1 else None
+                   for nodes, vehicles in zip(members, fleet)]
+        for nodes, vehicles, future in zip(members, fleet, futures):
+            if future is None:
+                continue
+            solution = future.result()
+            if solution is None:
+                return None
+            for route in solution.routes:
+                routes[vehicles[route.vehicle_id]] = nodes[route.nodes].tolist()
+
+    if repair and len(fleet) > 1:
+        routes = _repair(data, routes, labels, fleet, objective, k, coordinates)
+
+    # 按簇评估最终路线，同样只用到每簇的子矩阵
+    result = [None] * len(routes)
+    for vehicles in fleet:
+        if not len(vehicles):
+            continue
+        nodes = _members(routes, vehicles, depot)
+        sub = _sub_instance(data, nodes, vehicles, coordinates)
+        evaluated = make_solution(sub, _local_routes(routes, vehicles, nodes), objective)
+        for v, route in zip(vehicles.tolist(), evaluated.routes):
+            result[v] = route._replace(vehicle_id=v, nodes=routes[v])
+    return Solution(result, sum(route.distance for route in result),
+                    sum(route.cost for route in result), None)
@@ -0,0 +1,149 @@
+"""由坐标计算距离矩阵（向量化、分块）。
+
+平面坐标用欧几里得距离；经纬度坐标（(纬度, 经度)，单位为度）用大圆距离（haversine），
+可选 WGS84 椭球修正（Lambert 公式，与精确的测地线距离通常只差几米），单位为米。
+"""
+from functools import partial
+
+import numpy as np
+
+# 每个分块最多容纳的元素个数，决定临时数组的内存上限（约 32MB/块）
+BLOCK_ELEMENTS = 1 << 22
+# 地球平均半径与 WGS84 椭球的长半轴、扁率（米）
+EARTH_RADIUS = 6371008.8
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+
+
+def as_coordinates(nodes):
+    """把节点坐标转换为 (n, 2) 的 float64 数组。"""
+    coords = np.asarray(nodes, dtype=np.float64)
+    if coords.ndim != 2 or coords.shape[1] != 2:
+        raise ValueError(f'坐标应为 (n, 2) 的数组，实际为 {coords.shape}')
+    return coords
+
+
+def default_block_rows(num_nodes):
+    """根据节点数选择每块的行数。"""
+    return max(1, min(num_nodes, BLOCK_ELEMENTS // max(num_nodes, 1)))
+
+
+def _finish_block(block, decimals, dtype):
+    # 保持原来 round(..., 1) 的语义；整数类型按四舍五入取整
+    dtype = np.dtype(dtype)
+    if np.issubdtype(dtype, np.integer):
+        np.rint(block, out=block)
+    elif decimals is not None:
+        np.round(block, decimals, out=block)
+    return block.astype(dtype, copy=False)
+
+
+def euclidean_block(coords, start, stop, decimals=1, dtype=np.float64):
+    """计算第 start 到 stop 行的欧几里得距离块。"""
+    dx = coords[start:stop, 0, None] - coords[None, :, 0]
+    dy = coords[start:stop, 1, None] - coords[None, :, 1]
+    block = np.hypot(dx, dy, out=dx)
+    return _finish_block(block, decimals, dtype)
+
+
+def _central_angle(lat1, lon1, lat2, lon2):
+    # haversine 公式求球面上的圆心角（弧度），输入为弧度，可以广播
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def haversine_block(coords, start, stop, decimals=1, dtype=np.float64, ellipsoidal=False,
+                    radius=EARTH_RADIUS):
+    """计算第 start 到 stop 行的大圆距离块（米），coords 为 (纬度, 经度) 度数。
+
+    ellipsoidal 时在 WGS84 椭球上按 Lambert 公式修正，radius 不再使用。
+    """
+    lat, lon = np.radians(coords[:, 0]), np.radians(coords[:, 1])
+    if not ellipsoidal:
+        block = _central_angle(lat[start:stop, None], lon[start:stop, None],
+                               lat[None, :], lon[None, :])
+        block *= radius
+        return _finish_block(block, decimals, dtype)
+    # 化为归化纬度后在球面上求圆心角，再按两点的纬度修正
+    beta = np.arctan((1 - WGS84_F) * np.tan(lat))
+    beta1, beta2 = beta[start:stop, None], beta[None, :]
+    sigma = _central_angle(beta1, lon[start:stop, None], beta2, lon[None, :])
+    p, q = (beta1 + beta2) / 2, (beta2 - beta1) / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = (sigma - np.sin(sigma)) * (np.sin(p) * np.cos(q)) ** 2 / np.cos(sigma / 2) ** 2
+        y = (sigma + np.sin(sigma)) * (np.cos(p) * np.sin(q)) ** 2 / np.sin(sigma / 2) ** 2
+        block = WGS84_A * (sigma - WGS84_F / 2 * (x + y))
+    block[sigma == 0] = 0
+    return _finish_block(block, decimals, dtype)
+
+
+def iter_distance_blocks(nodes, block_rows=None, decimals=1, dtype=np.float64,
+                         block=euclidean_block):
+    """逐块生成距离矩阵，产出 (start, stop, block)。block 为计算一个分块的函数。"""
+    coords = as_coordinates(nodes)
+    num_nodes = len(coords)
+    if block_rows is None:
+        block_rows = default_block_rows(num_nodes)
+    for start in range(0, num_nodes, block_rows):
+        stop = min(start + block_rows, num_nodes)
+        yield start, stop, block(coords, start, stop, decimals, dtype)
+
+
+def distance_matrix(nodes, decimals=1, dtype=np.float64, block_rows=None, out=None,
+                    block=euclidean_block):
+    """计算完整的距离矩阵。
+
+    out 可以是预先分配的数组或 np.memmap，分块写入，避免整块的临时数组。
+    """
+    coords = as_coordinates(nodes)
+    num_nodes = len(coords)
+    if out is None:
+        out = np.empty((num_nodes, num_nodes), dtype=dtype)
+    elif out.shape != (num_nodes, num_nodes):
+        raise ValueError(f'out 的形状应为 {(num_nodes, num_nodes)}，实际为 {out.shape}')
+    for start, stop, values in iter_distance_blocks(coords, block_rows, decimals, out.dtype,
+                                                    block):
+        out[start:stop] = values
+    return out
+
+
+def haversine_matrix(nodes, decimals=1, dtype=np.float64, block_rows=None, out=None,
+                     ellipsoidal=False, radius=EARTH_RADIUS):
+    """经纬度坐标的完整距离矩阵（米）。
+
+    dtype=np.float32 时内存减半；整数 dtype 时四舍五入到整米，可以直接注册为转移矩阵。
+    """
+    block = partial(haversine_block, ellipsoidal=ellipsoidal, radius=radius)
+    return distance_matrix(nodes, decimals, dtype, block_rows, out, block)
+
+
+def haversine_knn(nodes, k, ellipsoidal=False, dtype=np.float64, block_rows=None,
+                  radius=EARTH_RADIUS):
+    """经纬度坐标的 k 近邻（不含自身），返回 (neighbors, distances)，形状均为 (n, k)。
+
+    分块计算整行距离后只保留每行最近的 k 个，内存为 O(n·k)，格式与 vrp.sparse.knn_graph 相同。
+    """
+    coords = as_coordinates(nodes)
+    num_nodes = len(coords)
+    k = min(k, num_nodes - 1)
+    neighbors = np.empty((num_nodes, k), dtype=np.int64)
+    distances = np.empty((num_nodes, k), dtype=dtype)
+    block = partial(haversine_block, ellipsoidal=ellipsoidal, radius=radius)
+    for start, stop, values in iter_distance_blocks(coords, block_rows, None, np.float64, block):
+        rows = np.arange(stop - start)
+        values[rows, rows + start] = np.inf
+        nearest = np.argpartition(values, k - 1, axis=1)[:, :k]
+        nearest_distances = np.take_along_axis(values, nearest, axis=1)
+        order = np.argsort(nearest_distances, axis=1)
+        neighbors[start:stop] = np.take_along_axis(nearest, order, axis=1)
+        distances[start:stop] = np.take_along_axis(nearest_distances, order, axis=1)
+    return neighbors, distances
+
+
+# 可选的距离度量：名称 -> f(nodes, decimals, dtype, block_rows, out)
+METRICS = {
+    'euclidean': distance_matrix,
+    'haversine': haversine_matrix,
+    'geodesic': partial(haversine_matrix, ellipsoidal=True),
+}
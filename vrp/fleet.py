@@ -0,0 +1,203 @@
+"""车队规模搜索：对每个车辆数求最小可行容量（容量-车辆数前沿）。
+
+以前的做法是手动修改 num_vehicles / vehicle_capacities 反复求解
+（见 mm.py 中“一辆车容量 4139 / 两辆车容量 2402 ...”的记录）。这里先用
+需求总量和装箱问题的下界（Martello-Toth L2）、首次适应递减（FFD）的上界
+把答案夹住，再在区间内并行地用求解器探测，每次探测用装箱结果或上一次的
+可行路线热启动。
+"""
+import math
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from vrp.solver import prepare_data, solve
+
+FleetPoint = namedtuple('FleetPoint', ['num_vehicles', 'capacity', 'lower_bound', 'solution'])
+
+
+def _customer_demands(data):
+    demands = np.asarray(data['demands'], dtype=np.int64)
+    return np.delete(demands, data.get('depot', 0))
+
+
+def bin_packing_bound(weights, capacity):
+    """Martello-Toth L2 下界：容量为 capacity 时至少需要几辆车。"""
+    weights = np.asarray(weights, dtype=np.int64)
+    if weights.size == 0:
+        return 0
+    if weights.max() > capacity:
+        return math.inf
+    best = math.ceil(weights.sum() / capacity)
+    half = capacity / 2
+    for alpha in np.unique(np.append(weights[weights <= half], 0)):
+        large = weights > capacity - alpha
+        medium = (weights <= capacity - alpha) & (weights > half)
+        small = (weights <= half) & (weights >= alpha)
+        free = medium.sum() * capacity - weights[medium].sum()
+        extra = max(0, math.ceil((weights[small].sum() - free) / capacity))
+        best = max(best, int(large.sum() + medium.sum() + extra))
+    return best
+
+
+def first_fit_decreasing(weights, capacity):
+    """首次适应递减装箱，返回每个箱子里的物品下标。"""
+    bins = []
+    loads = []
+    for item in np.argsort(-np.asarray(weights), kind='stable'):
+        weight = weights[item]
+        for b, load in enumerate(loads):
+            if load + weight <= capacity:
+                loads[b] += weight
+                bins[b].append(int(item))
+                break
+        else:
+            loads.append(weight)
+            bins.append([int(item)])
+    return bins
+
+
+def _smallest(lo, hi, predicate):
+    # 在 [lo, hi] 中找最小的满足 predicate 的整数，hi 必须满足
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if predicate(mid):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def capacity_bounds(demands, num_vehicles):
+    """num_vehicles 辆车所需容量的 (下界, 上界)。
+
+    下界：最小的 C 使 L2(C) <= num_vehicles，比 C-1 小的容量都装不下；
+    上界：最小的 C 使 FFD 能装进 num_vehicles 辆车，装箱结果本身就是可行解。
+    """
+    demands = np.asarray(demands, dtype=np.int64)
+    total = int(demands.sum())
+    lo = max(math.ceil(total / num_vehicles), int(demands.max(initial=0)))
+    lower = _smallest(lo, max(lo, total),
+                      lambda c: bin_packing_bound(demands, c) <= num_vehicles)
+    upper = _smallest(lower, max(lower, total),
+                      lambda c: len(first_fit_decreasing(demands, c)) <= num_vehicles)
+    return lower, upper
+
+
+def packing_routes(data, capacity, num_vehicles):
+    """用 FFD 装箱得到初始路线（客户节点，不含仓库），装不下时返回 None。"""
+    depot = data.get('depot', 0)
+    customers = np.delete(np.arange(len(data['demands'])), depot)
+    bins = first_fit_decreasing(_customer_demands(data), capacity)
+    if len(bins) > num_vehicles:
+        return None
+    routes = [customers[items].tolist() for items in bins]
+    return routes + [[] for _ in range(num_vehicles - len(routes))]
+
+
+def _fits(data, routes, capacity):
+    demands = np.asarray(data['demands'])
+    return all(demands[route].sum() <= capacity for route in routes)
+
+
+def _probe(data, num_vehicles, capacity, initial_routes, options):
+    data = dict(data, vehicle_capacities=[capacity] * num_vehicles, num_vehicles=num_vehicles)
+    return num_vehicles, capacity, solve(data, initial_routes=initial_routes, **options)
+
+
+def _probe_points(lo, hi, count):
+    # 在 [lo, hi) 中均匀取 count 个探测点（k 分搜索）
+    count = min(count, hi - lo)
+    return sorted({lo + (hi - lo) * (i + 1) // (count + 1) for i in range(count)})
+
+
+def fleet_frontier(data, fleet_sizes, max_workers=None, time_limit=2, **options):
+    """对每个车辆数求最小可行容量，返回 FleetPoint 列表。
+
+    每个探测都是一次限时求解，options 原样传给 vrp.solver.solve。
+    """
+    data = prepare_data(data)
+    demands = _customer_demands(data)
+    options = dict(options, time_limit=time_limit)
+    max_workers = max_workers or os.cpu_count()
+
+    # 每个车辆数的搜索区间 [lo, hi]，hi 总是已知可行的容量
+    state = {}
+    for num_vehicles in fleet_sizes:
+        lower, upper = capacity_bounds(demands, num_vehicles)
+        state[num_vehicles] = {'lower': lower, 'lo': lower, 'hi': upper,
+                               'routes': packing_routes(data, upper, num_vehicles),
+                               'solution': None}
+
+    with ProcessPoolExecutor(max_workers) as executor:
+        # 先确认上界，拿到可行路线用于后续热启动
+        futures = [executor.submit(_probe, data, k, s['hi'], s['routes'], options)
+                   for k, s in state.items()]
+        for future in futures:
+            num_vehicles, capacity, solution = future.result()
+            if solution is not None:
+                state[num_vehicles]['solution'] = solution
+                state[num_vehicles]['routes'] = [route.nodes[1:-1] for route in solution.routes]
+
+        while True:
+            open_sizes = [k for k, s in state.items() if s['lo'] < s['hi']]
+            if not open_sizes:
+                break
+            per_size = max(1, max_workers // len(open_sizes))
+            futures = []
+            for k in open_sizes:
+                s = state[k]
+                for capacity in _probe_points(s['lo'], s['hi'], per_size):
+                    routes = packing_routes(data, capacity, k)
+                    if routes is None and _fits(data, s['routes'], capacity):
+                        routes = s['routes']
+                    futures.append(executor.submit(_probe, data, k, capacity, routes, options))
+            results = {}
+            for future in futures:
+                num_vehicles, capacity, solution = future.result()
+                results.setdefault(num_vehicles, []).append((capacity, solution))
+            for k, probes in results.items():
+                s = state[k]
+                for capacity, solution in sorted(probes, key=lambda probe: probe[0]):
+                    if solution is not None:
+                        s['hi'] = capacity
+                        s['solution'] = solution
+                        s['routes'] = [route.nodes[1:-1] for route in solution.routes]
+                        break
+                    s['lo'] = capacity + 1
+
+    return [FleetPoint(k, s['hi'], s['lower'], s['solution']) for k, s in state.items()]
+
+
+def min_vehicles(data, capacity, time_limit=2, **options):
+    """容量固定时，二分搜索最少的车辆数，返回 (车辆数, solution)。
+
+    有客户的需求超过 capacity 时任何车辆数都不可行，抛出 ValueError。
+    """
+    data = prepare_data(data)
+    demands = _customer_demands(data)
+    if len(demands) and demands.max() > capacity:
+        raise ValueError(f'最大的客户需求 {demands.max()} 超过车辆容量 {capacity}，实例不可行')
+    lower = bin_packing_bound(demands, capacity)
+    upper = len(first_fit_decreasing(demands, capacity))
+    options = dict(options, time_limit=time_limit)
+    best = _probe(data, upper, capacity, packing_routes(data, capacity, upper), options)[2]
+    lo, hi = lower, upper
+    while lo < hi:
+        mid = (lo + hi) // 2
+        solution = _probe(data, mid, capacity, packing_routes(data, capacity, mid), options)[2]
+        if solution is not None:
+            hi, best = mid, solution
+        else:
+            lo = mid + 1
+    return hi, best
+
+
+def print_frontier(frontier):
+    """打印容量-车辆数前沿。"""
+    for point in frontier:
+        distance = f'{point.solution.distance:.2f}m' if point.solution else '-'
+        print(f'{point.num_vehicles} 辆车：容量 {point.capacity}'
+              f'（下界 {point.lower_bound}），总距离 {distance}')
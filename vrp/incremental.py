@@ -0,0 +1,173 @@
+"""日内订单变化后的增量重规划。
+
+站点新增、取消或需求变化时，不再从 PATH_CHEAPEST_ARC 重新求解：
+先把变化应用到数据上，把上一次的路线映射到新的节点编号，
+用最便宜插入法放入新增节点、修复超载的路线，再以此为初始解短时间优化。
+
+    data, solution, node_map = resolve(data, solution, Delta(removed=[3], demands={5: 400}))
+
+时间窗实例新增节点时，Delta 中要同时给出新增节点的时间窗（以及数据中已有的
+服务时间、行驶时间矩阵、坐标），否则 apply_delta 抛出 ValueError。
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from vrp.solver import prepare_data, solve
+
+Delta = namedtuple('Delta', ['added_demands', 'added_out', 'added_in', 'removed', 'demands',
+                             'added_time_windows', 'added_service_times', 'added_time_out',
+                             'added_time_in', 'added_coordinates'],
+                   defaults=((), None, None, (), None, None, None, None, None, None))
+Delta.__doc__ = """订单变化。
+
+added_demands：新增节点的需求；新增节点排在原有节点之后。
+added_out：(k, n + k) 新增节点到所有节点（原有节点在前）的距离。
+added_in：(n + k, k) 所有节点到新增节点的距离，默认为 added_out 的转置（对称距离）。
+removed：取消的节点（原编号）。
+demands：{节点（原编号）: 新需求}。
+added_time_windows / added_service_times / added_coordinates：新增节点的时间窗、
+服务时间和坐标，数据中有对应字段时必须给出。
+added_time_out / added_time_in：与 added_out / added_in 相同，用于 'time_matrix'。
+"""
+
+# 按节点给出的字段：(字段, Delta 中新增节点的取值)
+NODE_KEYS = (('time_windows', 'added_time_windows'), ('service_times', 'added_service_times'),
+             ('coordinates', 'added_coordinates'))
+
+
+def _extend_matrix(matrix, added_out, added_in, added):
+    # 在矩阵右侧和下方拼上新增节点的行与列，added_in 默认为 added_out 的转置
+    num_nodes = len(matrix)
+    added_out = np.asarray(added_out, dtype=matrix.dtype).reshape(added, num_nodes + added)
+    added_in = added_out.T if added_in is None else np.asarray(added_in, dtype=matrix.dtype)
+    return np.block([[matrix, added_in[:num_nodes]], [added_out]])
+
+
+def apply_delta(data, delta):
+    """把变化应用到数据上，返回 (新数据, 原编号到新编号的映射)，被删除的节点映射为 -1。
+
+    距离矩阵、需求以及时间窗、服务时间、行驶时间矩阵、坐标等按节点给出的字段
+    都按新的节点编号重建；新增节点缺少数据中已有字段的取值时抛出 ValueError。
+    车辆不变，按车辆给出的字段（容量、成本倍率、固定成本）原样保留。
+    """
+    coordinates = data.get('coordinates')
+    data = prepare_data(data)
+    if coordinates is not None:
+        data['coordinates'] = coordinates
+    matrix = data['distance_matrix']
+    demands = data['demands'].copy()
+    num_nodes = len(demands)
+    if delta.demands:
+        nodes = np.fromiter(delta.demands.keys(), dtype=np.int64)
+        demands[nodes] = np.fromiter(delta.demands.values(), dtype=np.int64)
+
+    fields = {key: np.asarray(data[key]) for key, _ in NODE_KEYS if data.get(key) is not None}
+    time_matrix = data.get('time_matrix')
+    if time_matrix is not None:
+        time_matrix = np.asarray(time_matrix)
+    for key, values in fields.items():
+        if len(values) != num_nodes:
+            raise ValueError(f"'{key}' 有 {len(values)} 项，与节点数 {num_nodes} 不一致")
+
+    added = len(delta.added_demands)
+    if added:
+        matrix = _extend_matrix(matrix, delta.added_out, delta.added_in, added)
+        demands = np.concatenate([demands, np.asarray(delta.added_demands, dtype=np.int64)])
+        for key, added_key in NODE_KEYS:
+            if key not in fields:
+                continue
+            values = getattr(delta, added_key)
+            if values is None:
+                raise ValueError(f"数据中有 '{key}'，新增节点需要在 Delta.{added_key} 中给出")
+            values = np.asarray(values, dtype=fields[key].dtype)
+            if len(values) != added:
+                raise ValueError(f'Delta.{added_key} 应有 {added} 项，实际为 {len(values)} 项')
+            fields[key] = np.concatenate([fields[key], values])
+        if time_matrix is not None:
+            if delta.added_time_out is None:
+                raise ValueError("数据中有 'time_matrix'，新增节点需要在 Delta.added_time_out 中给出")
+            time_matrix = _extend_matrix(time_matrix, delta.added_time_out, delta.added_time_in,
+                                         added)
+
+    if data['depot'] in delta.removed:
+        raise ValueError('不能删除仓库节点')
+    keep = np.ones(len(demands), dtype=bool)
+    keep[list(delta.removed)] = False
+    node_map = np.full(len(demands), -1, dtype=np.int64)
+    node_map[keep] = np.arange(keep.sum())
+    depot = int(node_map[data['depot']])
+
+    new_data = dict(data,
+                    distance_matrix=np.ascontiguousarray(matrix[np.ix_(keep, keep)]),
+                    demands=demands[keep],
+                    depot=depot)
+    new_data.update((key, values[keep]) for key, values in fields.items())
+    if time_matrix is not None:
+        new_data['time_matrix'] = np.ascontiguousarray(time_matrix[np.ix_(keep, keep)])
+    return new_data, node_map
+
+
+def insertion_cost(matrix, depot, route, node):
+    """把 node 插入 route 各个位置的增量距离（route 不含仓库）。"""
+    path = np.concatenate([[depot], route, [depot]]).astype(np.int64)
+    before, after = path[:-1], path[1:]
+    return matrix[before, node] + matrix[node, after] - matrix[before, after]
+
+
+def repair_routes(data, routes, pending=()):
+    """修复超载的路线，并用最便宜插入法放入 pending 中的节点。
+
+    超载的路线从需求最大的节点开始移出，与 pending 一起重新插入。
+    放不下的节点留给求解器处理（此时初始解不完整，求解器会从头求解）。
+    """
+    matrix = data['distance_matrix']
+    demands = data['demands']
+    capacities = np.asarray(data['vehicle_capacities'])
+    depot = data['depot']
+    routes = [list(route) for route in routes]
+    routes += [[] for _ in range(len(capacities) - len(routes))]
+    pending = list(pending)
+
+    loads = np.array([demands[route].sum() if route else 0 for route in routes])
+    for vehicle, route in enumerate(routes):
+        while loads[vehicle] > capacities[vehicle]:
+            node = max(route, key=lambda n: demands[n])
+            route.remove(node)
+            loads[vehicle] -= demands[node]
+            pending.append(node)
+
+    # 需求大的节点先插入
+    for node in sorted(pending, key=lambda n: -demands[n]):
+        best = None
+        for vehicle in np.flatnonzero(loads + demands[node] <= capacities):
+            costs = insertion_cost(matrix, depot, routes[vehicle], node)
+            position = int(np.argmin(costs))
+            if best is None or costs[position] < best[0]:
+                best = (costs[position], vehicle, position)
+        if best is not None:
+            _, vehicle, position = best
+            routes[vehicle].insert(position, int(node))
+            loads[vehicle] += demands[node]
+    return routes
+
+
+def resolve(data, solution, delta, time_limit=1, objective='distance',
+            local_search_metaheuristic='GUIDED_LOCAL_SEARCH', **options):
+    """应用变化并以上一次的解热启动重新求解，返回 (新数据, 新解, 原编号到新编号的映射)。
+
+    节点编号以新数据为准，被删除的节点在映射中为 -1。
+    """
+    new_data, node_map = apply_delta(data, delta)
+    routes = []
+    for route in solution.routes:
+        nodes = node_map[np.asarray(route.nodes[1:-1], dtype=np.int64)]
+        routes.append(nodes[nodes >= 0].tolist())
+    num_old = len(node_map) - len(delta.added_demands)
+    added = node_map[num_old:]
+    routes = repair_routes(new_data, routes, added[added >= 0].tolist())
+
+    new_solution = solve(new_data, objective=objective, time_limit=time_limit,
+                         local_search_metaheuristic=local_search_metaheuristic,
+                         initial_routes=routes, **options)
+    return new_data, new_solution, node_map
@@ -0,0 +1,301 @@
+"""从 JSONL / CSV / NPZ 文件流式读取实例。
+
+每个实例是一个字典，键与脚本中的 data 相同：'distance_matrix' 或 'coordinates'、
+'demands'、'vehicle_capacities'（也接受 'vehicle_capacity'），可选 'num_vehicles'、'depot'、'name'。
+数组字段直接解析为 NumPy 数组（矩阵和坐标为 float64，需求和容量为 int64），
+大矩阵不经过 json 的嵌套列表；实例逐个产生，不会一次把整批读入内存。
+
+- JSONL：每行一个 JSON 对象；
+- CSV：每个文件一个实例，表头含 x、y、demand 列（第一行数据为仓库），
+  其他字段写成 '# 键: JSON 值' 形式的注释行，例如 '# vehicle_capacities: [15, 15]'；
+- NPZ：每个文件一个实例，键名同上；
+- VRP：CVRPLIB（TSPLIB）格式，如 Augerat 的 A、P 集和 X 集，EUC_2D 距离按惯例取整；
+- 目录：按文件名顺序读取其中的 *.json、*.jsonl、*.csv、*.npz、*.vrp。
+"""
+import json
+import math
+import re
+from pathlib import Path
+
+import numpy as np
+
+from vrp.distance import distance_matrix
+from vrp.fleet import first_fit_decreasing
+
+MATRIX_KEYS = ('distance_matrix', 'coordinates')
+SUFFIXES = ('.json', '.jsonl', '.csv', '.npz', '.vrp')
+_MATRIX_END = re.compile(r'\]\s*\]')
+_MATRIX_KEY = {key: re.compile(rf'"{key}"\s*:\s*') for key in MATRIX_KEYS}
+_BRACKETS = {ord('['): ' ', ord(']'): ' '}
+
+
+def _row_lengths(text):
+    # 每一行的元素个数：行内 '[' 与 ']' 之间的逗号数加一
+    chars = np.frombuffer(text.encode(), dtype=np.uint8)
+    opens = np.flatnonzero(chars == ord('['))[1:]
+    closes = np.flatnonzero(chars == ord(']'))[:-1]
+    if len(opens) != len(closes) or (opens > closes).any():
+        raise ValueError('二维数组的括号不匹配')
+    commas = np.flatnonzero(chars == ord(','))
+    return np.searchsorted(commas, closes) - np.searchsorted(commas, opens) + 1
+
+
+def parse_matrix(text, square=False):
+    """把 '[[1, 2], [3, 4]]' 形式的二维数值数组文本直接解析为 float64 数组。
+
+    每一行的长度必须相同；square 为真时还要求行长等于行数。
+    """
+    lengths = _row_lengths(text)
+    rows = len(lengths)
+    if rows == 0 or (lengths != lengths[0]).any():
+        raise ValueError('二维数组的每一行长度必须相同')
+    if square and lengths[0] != rows:
+        raise ValueError(f'矩阵有 {rows} 行，但每行有 {lengths[0]} 个元素')
+    values = np.fromstring(text.translate(_BRACKETS), dtype=np.float64, sep=',')
+    if values.size != rows * lengths[0]:
+        raise ValueError('二维数组中有无法解析的元素')
+    return values.reshape(rows, -1)
+
+
+def _split_matrices(line, name=None):
+    # 把一行 JSON 中的二维数组取出来单独解析，其余部分交给 json
+    matrices = {}
+    for key in MATRIX_KEYS:
+        found = _MATRIX_KEY[key].search(line)
+        if found is None:
+            continue
+        begin = found.end()
+        end = _MATRIX_END.search(line, begin) if line.startswith('[', begin) else None
+        if end is None:
+            raise ValueError(f'{name or "实例"} 的 {key} 必须是二维数组')
+        matrices[key] = parse_matrix(line[begin:end.end()], square=key == 'distance_matrix')
+        line = line[:begin] + 'null' + line[end.end():]
+    return line, matrices
+
+
+def as_instance(instance, symmetric=False):
+    """把实例的数组字段转换为有类型的 NumPy 数组并校验，返回同一个字典。
+
+    symmetric 为真时还要求距离矩阵对称。
+    """
+    for key in MATRIX_KEYS:
+        if key in instance:
+            instance[key] = np.asarray(instance[key], dtype=np.float64)
+    instance['demands'] = np.asarray(instance['demands'], dtype=np.int64)
+    if 'vehicle_capacity' in instance and 'vehicle_capacities' not in instance:
+        instance['vehicle_capacities'] = instance.pop('vehicle_capacity')
+    instance['vehicle_capacities'] = np.atleast_1d(
+        np.asarray(instance['vehicle_capacities'], dtype=np.int64))
+    validate(instance, symmetric)
+    return instance
+
+
+def validate(instance, symmetric=False):
+    """检查实例各字段的形状和取值，不合法时抛出 ValueError。
+
+    symmetric 为真时还要求距离矩阵对称。
+    """
+    name = instance.get('name', '实例')
+    if not any(key in instance for key in MATRIX_KEYS):
+        raise ValueError(f'{name} 缺少 distance_matrix 或 coordinates')
+    demands = np.asarray(instance['demands'])
+    num_nodes = len(demands)
+    if 'distance_matrix' in instance:
+        matrix = np.asarray(instance['distance_matrix'])
+        if matrix.shape != (num_nodes, num_nodes):
+            raise ValueError(f'{name} 的距离矩阵形状为 {matrix.shape}，应为 {(num_nodes,) * 2}')
+        if symmetric and not np.array_equal(matrix, matrix.T):
+            raise ValueError(f'{name} 的距离矩阵不对称')
+    if 'coordinates' in instance and np.shape(instance['coordinates']) != (num_nodes, 2):
+        raise ValueError(f'{name} 的坐标形状为 {np.shape(instance["coordinates"])}，'
+                         f'应为 {(num_nodes, 2)}')
+    if (demands < 0).any():
+        raise ValueError(f'{name} 的需求不能为负数')
+    capacities = np.asarray(instance['vehicle_capacities'])
+    if capacities.ndim != 1 or not len(capacities) or (capacities <= 0).any():
+        raise ValueError(f'{name} 的车辆容量必须是正数列表')
+    num_vehicles = instance.get('num_vehicles', len(capacities))
+    if num_vehicles != len(capacities):
+        raise ValueError(f'{name} 的 num_vehicles 为 {num_vehicles}，'
+                         f'但有 {len(capacities)} 个车辆容量')
+    if not 0 <= instance.get('depot', 0) < num_nodes:
+        raise ValueError(f'{name} 的仓库编号超出范围')
+
+
+def parse_instance(text, name=None, symmetric=False):
+    """解析一个 JSON 对象文本形式的实例，name 为没有 'name' 字段时的默认名字。"""
+    rest, matrices = _split_matrices(text, name)
+    instance = json.loads(rest)
+    instance.update(matrices)
+    if name is not None:
+        instance.setdefault('name', name)
+    return as_instance(instance, symmetric)
+
+
+def read_jsonl(path, symmetric=False):
+    """逐行读取 JSONL 文件中的实例，名字默认为 '文件名:行号'。"""
+    path = Path(path)
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            yield parse_instance(line, f'{path.stem}:{line_number}', symmetric)
+
+
+def read_json(path, symmetric=False):
+    """读取单个 JSON 文件中的实例，名字默认为文件名。"""
+    path = Path(path)
+    with open(path, encoding='utf-8') as f:
+        return parse_instance(f.read(), path.stem, symmetric)
+
+
+def read_csv(path, symmetric=False):
+    """读取 CSV 站点表（x、y、demand 列）及注释行中的其他字段。"""
+    path = Path(path)
+    instance = {'name': path.stem}
+    with open(path, encoding='utf-8') as f:
+        line = f.readline()
+        while line.startswith('#') or not line.strip():
+            if line.startswith('#'):
+                key, _, value = line[1:].partition(':')
+                instance[key.strip()] = json.loads(value)
+            line = f.readline()
+        columns = [column.strip() for column in line.split(',')]
+        missing = {'x', 'y', 'demand'} - set(columns)
+        if missing:
+            raise ValueError(f'{path} 缺少列：{", ".join(sorted(missing))}')
+        table = np.loadtxt(f, delimiter=',', comments='#', ndmin=2)
+    instance['coordinates'] = table[:, [columns.index('x'), columns.index('y')]]
+    instance['demands'] = table[:, columns.index('demand')]
+    return as_instance(instance, symmetric)
+
+
+def read_npz(path, symmetric=False):
+    """读取 NPZ 文件中的实例，名字默认为文件名。"""
+    path = Path(path)
+    with np.load(path) as arrays:
+        instance = {key: arrays[key] for key in arrays.files}
+    for key in ('name', 'num_vehicles', 'depot'):
+        if key in instance:
+            instance[key] = instance[key].item()
+    instance.setdefault('name', path.stem)
+    return as_instance(instance, symmetric)
+
+
+def _explicit_weights(values, dimension, layout):
+    # TSPLIB 的 EDGE_WEIGHT_SECTION：整矩阵或上/下三角（可含对角线）按行展开
+    if layout == 'FULL_MATRIX':
+        return values[:dimension * dimension].reshape(dimension, dimension)
+    offset = 0 if '_DIAG_' in layout else 1
+    if layout.startswith('LOWER'):
+        rows, cols = np.tril_indices(dimension, -offset)
+    else:
+        rows, cols = np.triu_indices(dimension, offset)
+    matrix = np.zeros((dimension, dimension))
+    matrix[rows, cols] = values[:len(rows)]
+    return np.maximum(matrix, matrix.T)
+
+
+def read_vrp(path, symmetric=False):
+    """读取 CVRPLIB 格式的 .vrp 文件。
+
+    车辆数取名字中的 '-k数字'（没有时按 FFD 装箱估算）；COMMENT 中的
+    'Optimal value' / 'Best value' 记为 'best_known'，同名 .sol 文件中的 Cost 优先。
+    节点编号从 1 开始，读入后减 1。
+    """
+    path = Path(path)
+    header, sections, current = {}, {}, None
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line == 'EOF':
+                continue
+            key, colon, value = line.partition(':')
+            if line.endswith('_SECTION'):
+                current = sections.setdefault(line, [])
+            elif colon and key.strip().isupper() and not key.strip()[0].isdigit():
+                header[key.strip()] = value.strip()
+                current = None
+            elif current is not None:
+                current.append(line)
+
+    dimension = int(header['DIMENSION'])
+    capacity = int(header['CAPACITY'])
+    demand = np.array(' '.join(sections['DEMAND_SECTION']).split(), dtype=np.int64)
+    demands = np.zeros(dimension, dtype=np.int64)
+    demands[demand[0::2] - 1] = demand[1::2]
+    depots = np.array(' '.join(sections.get('DEPOT_SECTION', ['1'])).split(), dtype=np.int64)
+    instance = {'name': header.get('NAME', path.stem), 'demands': demands,
+                'depot': int(depots[depots > 0][0]) - 1}
+
+    weight_type = header.get('EDGE_WEIGHT_TYPE', 'EUC_2D')
+    if 'NODE_COORD_SECTION' in sections:
+        table = np.array(' '.join(sections['NODE_COORD_SECTION']).split(), dtype=np.float64)
+        table = table.reshape(dimension, -1)
+        instance['coordinates'] = table[np.argsort(table[:, 0]), 1:3]
+    if weight_type == 'EXPLICIT':
+        values = np.array(' '.join(sections['EDGE_WEIGHT_SECTION']).split(), dtype=np.float64)
+        instance['distance_matrix'] = _explicit_weights(
+            values, dimension, header.get('EDGE_WEIGHT_FORMAT', 'FULL_MATRIX'))
+    elif weight_type == 'EUC_2D':
+        instance['distance_matrix'] = distance_matrix(instance['coordinates'], decimals=0)
+    else:
+        raise ValueError(f'{path} 的 EDGE_WEIGHT_TYPE {weight_type} 不受支持')
+
+    match = re.search(r'-k(\d+)', instance['name'])
+    if match:
+        num_vehicles = int(match.group(1))
+    elif 'VEHICLES' in header:
+        num_vehicles = int(header['VEHICLES'])
+    else:
+        num_vehicles = len(first_fit_decreasing(np.delete(demands, instance['depot']), capacity))
+    instance['vehicle_capacities'] = [capacity] * num_vehicles
+
+    best = re.search(r'(?:Optimal|Best) value:\s*([\d.]+)', header.get('COMMENT', ''))
+    solution = path.with_suffix('.sol')
+    if solution.exists():
+        instance['best_known'] = read_sol(solution)[0]
+    elif best:
+        instance['best_known'] = float(best.group(1))
+    return as_instance(instance, symmetric)
+
+
+def read_sol(path):
+    """读取 CVRPLIB 的 .sol 文件，返回 (成本, 路线列表)；路线中的客户编号与 .vrp 的下标一致。"""
+    routes, cost = [], math.nan
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('Route'):
+                routes.append([int(node) for node in line.partition(':')[2].split()])
+            elif line.lower().startswith('cost'):
+                cost = float(line.split()[1])
+    return cost, routes
+
+
+def iter_instances(path, symmetric=False):
+    """按文件类型逐个读取实例；目录下按文件名顺序读取所有支持的文件。
+
+    symmetric 为真时要求每个实例的距离矩阵对称，否则抛出 ValueError。
+    """
+    path = Path(path)
+    if path.is_dir():
+        for file in sorted(path.iterdir()):
+            if file.suffix in SUFFIXES:
+                yield from iter_instances(file, symmetric)
+    elif path.suffix == '.jsonl':
+        yield from read_jsonl(path, symmetric)
+    elif path.suffix == '.json':
+        yield read_json(path, symmetric)
+    elif path.suffix == '.csv':
+        yield read_csv(path, symmetric)
+    elif path.suffix == '.npz':
+        yield read_npz(path, symmetric)
+    elif path.suffix == '.vrp':
+        yield read_vrp(path, symmetric)
+    else:
+        raise ValueError(f'不支持的实例文件类型：{path}')
+
+
+def load_instance(path, symmetric=False):
+    """读取文件中的第一个实例。"""
+    return next(iter(iter_instances(path, symmetric)))
@@ -0,0 +1,233 @@
+"""独立于 OR-Tools 的局部搜索（relocate、swap、2-opt、2-opt*、or-opt）。
+
+直接作用于路线和距离（成本）矩阵：每个节点只尝试与它的 k 个近邻组成的移动，
+同一节点的所有候选移动用 NumPy 一次算出 O(1) 的增量成本；
+容量用每条路线的前缀载重检查；没有改进的节点置上 don't-look 位，
+直到它附近的路线发生变化才重新检查。
+
+可以在 SolveWithParameters 之后做一次廉价的打磨，也可以单独用于需要毫秒级
+响应的派单请求。
+"""
+from collections import deque
+
+import numpy as np
+
+from vrp.distance import default_block_rows
+from vrp.solver import cost_matrix, make_solution, prepare_data
+
+OPERATORS = ('relocate', 'swap', 'two_opt', 'two_opt_star', 'or_opt')
+EPSILON = 1e-9
+
+
+def nearest_neighbors(matrix, k, depot=0, block_rows=None):
+    """按成本矩阵求每个节点的 k 个最近客户（不含自身和仓库）。
+
+    按行分块处理，临时数组只有一个分块大小，矩阵可以是 np.memmap。
+    """
+    num_nodes = len(matrix)
+    k = max(1, min(k, num_nodes - 2))
+    if block_rows is None:
+        block_rows = default_block_rows(num_nodes)
+    neighbors = np.empty((num_nodes, k), dtype=np.int64)
+    for start in range(0, num_nodes, block_rows):
+        stop = min(start + block_rows, num_nodes)
+        masked = np.array(matrix[start:stop], dtype=np.float64)
+        masked[:, depot] = np.inf
+        rows = np.arange(stop - start)
+        masked[rows, rows + start] = np.inf
+        nearest = np.argpartition(masked, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(masked, nearest, axis=1), axis=1)
+        neighbors[start:stop] = np.take_along_axis(nearest, order, axis=1)
+    return neighbors
+
+
+class RouteState:
+    """路线及其索引数组：每个客户所在的路线、位置、前驱、后继和前缀载重。"""
+
+    def __init__(self, routes, demands, capacities):
+        self.routes = [list(route) for route in routes]
+        self.demands = demands
+        self.capacities = np.asarray(capacities, dtype=np.int64)
+        num_nodes = len(demands)
+        self.route_of = np.full(num_nodes, -1, dtype=np.int64)
+        self.pos_of = np.zeros(num_nodes, dtype=np.int64)
+        self.pred = np.zeros(num_nodes, dtype=np.int64)
+        self.succ = np.zeros(num_nodes, dtype=np.int64)
+        self.prefix = np.zeros(num_nodes, dtype=np.int64)
+        self.load = np.zeros(len(self.routes), dtype=np.int64)
+        for route in range(len(self.routes)):
+            self.refresh(route)
+
+    def refresh(self, route):
+        """路线变化后更新它的索引。"""
+        nodes = self.routes[route]
+        customers = np.asarray(nodes[1:-1], dtype=np.int64)
+        self.load[route] = self.demands[customers].sum()
+        if len(customers):
+            self.route_of[customers] = route
+            self.pos_of[customers] = np.arange(1, len(nodes) - 1)
+            self.pred[customers] = nodes[:-2]
+            self.succ[customers] = nodes[2:]
+            self.prefix[customers] = np.cumsum(self.demands[customers])
+
+
+def _best(candidates):
+    # candidates: [(名称, 增量数组, 有效掩码, 对应的节点)]，返回最好的 (增量, 名称, 节点)
+    best = (-EPSILON, None, None)
+    for name, delta, valid, others in candidates:
+        if not valid.any():
+            continue
+        delta = np.where(valid, delta, np.inf)
+        i = int(np.argmin(delta))
+        if delta[i] < best[0]:
+            best = (float(delta[i]), name, int(others[i]))
+    return best
+
+
+def _moves(state, matrix, u, v, operators, symmetric):
+    """节点 u 与近邻 v 组成的所有移动的增量成本。"""
+    demands = state.demands
+    capacities = state.capacities
+    load = state.load
+    p, s = state.pred[u], state.succ[u]
+    ru = state.route_of[u]
+    rv = state.route_of[v]
+    vp, vs = state.pred[v], state.succ[v]
+    same = rv == ru
+    candidates = []
+
+    if 'relocate' in operators:
+        gain = matrix[p, s] - matrix[p, u] - matrix[u, s]
+        fits = same | (load[rv] + demands[u] <= capacities[rv])
+        candidates.append(('relocate_after', gain + matrix[v, u] + matrix[u, vs] - matrix[v, vs],
+                           fits & (v != p), v))
+        candidates.append(('relocate_before', gain + matrix[vp, u] + matrix[u, v] - matrix[vp, v],
+                           fits & (v != s), v))
+
+    if 'swap' in operators:
+        delta = (matrix[p, v] + matrix[v, s] - matrix[p, u] - matrix[u, s]
+                 + matrix[vp, u] + matrix[u, vs] - matrix[vp, v] - matrix[v, vs])
+        fits = same | ((load[ru] - demands[u] + demands[v] <= capacities[ru])
+                       & (load[rv] - demands[v] + demands[u] <= capacities[rv]))
+        candidates.append(('swap', delta, fits & (v != s) & (v != p), v))
+
+    if 'two_opt' in operators and symmetric:
+        before = state.pos_of[v] > state.pos_of[u]
+        delta = np.where(before,
+                         matrix[u, v] + matrix[s, vs] - matrix[u, s] - matrix[v, vs],
+                         matrix[vp, p] + matrix[v, u] - matrix[vp, v] - matrix[p, u])
+        valid = same & np.where(before, v != s, v != p)
+        candidates.append(('two_opt', delta, valid, v))
+
+    if 'two_opt_star' in operators:
+        # 交换两条路线的尾部：u -> v 的后继，v -> u 的后继
+        tail_u = load[ru] - state.prefix[u]
+        tail_v = load[rv] - state.prefix[v]
+        delta = matrix[u, vs] + matrix[v, s] - matrix[u, s] - matrix[v, vs]
+        fits = ((state.prefix[u] + tail_v <= capacities[ru])
+                & (state.prefix[v] + tail_u <= capacities[rv]))
+        candidates.append(('two_opt_star_tails', delta, ~same & fits, v))
+        # 交换两条路线的头部：u 的前驱 -> v，v 的前驱 -> u
+        head_u = state.prefix[u] - demands[u]
+        head_v = state.prefix[v] - demands[v]
+        delta = matrix[p, v] + matrix[vp, u] - matrix[p, u] - matrix[vp, v]
+        fits = ((head_u + load[rv] - head_v <= capacities[ru])
+                & (head_v + load[ru] - head_u <= capacities[rv]))
+        candidates.append(('two_opt_star_heads', delta, ~same & fits, v))
+
+    if 'or_opt' in operators:
+        route = state.routes[ru]
+        i = state.pos_of[u]
+        for length in (2, 3):
+            if i + length > len(route) - 1:
+                break
+            segment = route[i:i + length]
+            e, es = segment[-1], route[i + length]
+            segment_load = state.prefix[e] - state.prefix[u] + demands[u]
+            gain = matrix[p, es] - matrix[p, u] - matrix[e, es]
+            delta = gain + matrix[v, u] + matrix[e, vs] - matrix[v, vs]
+            valid = ((v != p) & ~np.isin(v, segment)
+                     & (same | (load[rv] + segment_load <= capacities[rv])))
+            candidates.append((f'or_opt_{length}', delta, valid, v))
+
+    return _best(candidates)
+
+
+def _apply(state, name, u, v):
+    """执行移动，返回受影响的路线。"""
+    routes = state.routes
+    ru, rv = state.route_of[u], state.route_of[v]
+    i, j = state.pos_of[u], state.pos_of[v]
+    if name in ('relocate_after', 'relocate_before'):
+        routes[ru].remove(u)
+        position = routes[rv].index(v) + (name == 'relocate_after')
+        routes[rv].insert(position, u)
+    elif name == 'swap':
+        routes[ru][i], routes[rv][j] = v, u
+    elif name == 'two_opt':
+        route = routes[ru]
+        lo, hi = (i + 1, j) if j > i else (j, i - 1)
+        route[lo:hi + 1] = route[lo:hi + 1][::-1]
+    elif name == 'two_opt_star_tails':
+        a, b = routes[ru], routes[rv]
+        routes[ru], routes[rv] = a[:i + 1] + b[j + 1:], b[:j + 1] + a[i + 1:]
+    elif name == 'two_opt_star_heads':
+        a, b = routes[ru], routes[rv]
+        routes[ru], routes[rv] = a[:i] + b[j:], b[:j] + a[i:]
+    else:
+        length = int(name[-1])
+        segment = routes[ru][i:i + length]
+        del routes[ru][i:i + length]
+        position = routes[rv].index(v) + 1
+        routes[rv][position:position] = segment
+    return {int(ru), int(rv)}
+
+
+def improve(data, routes, objective='distance', k=10, operators=OPERATORS, max_moves=None,
+            start_nodes=None):
+    """对路线做局部搜索直到局部最优，返回新的路线（节点列表，含仓库）。
+
+    routes 的数量应与车辆数一致；目标函数与 vrp.solver 相同。
+    2-opt 需要反转路段，只在成本矩阵对称时使用。
+    start_nodes 不为空时只从这些客户开始检查，其余客户在附近路线变化后才加入。
+    """
+    data = prepare_data(data)
+    matrix = cost_matrix(objective, data['distance_matrix'], data['demands'])
+    symmetric = np.array_equal(matrix, matrix.T)
+    depot = data['depot']
+    neighbors = nearest_neighbors(matrix, k, depot)
+    state = RouteState(routes, data['demands'], data['vehicle_capacities'])
+
+    customers = np.flatnonzero(state.route_of >= 0)
+    if start_nodes is not None:
+        customers = np.intersect1d(customers, start_nodes)
+    active = deque(customers.tolist())
+    queued = np.zeros(len(matrix), dtype=bool)
+    queued[customers] = True
+    moves = 0
+    while active and (max_moves is None or moves < max_moves):
+        u = active.popleft()
+        queued[u] = False
+        v = neighbors[u]
+        v = v[state.route_of[v] >= 0]
+        if not len(v):
+            continue
+        delta, name, other = _moves(state, matrix, u, v, operators, symmetric)
+        if name is None:
+            continue  # don't-look 位：直到附近的路线变化前不再检查 u
+        changed = _apply(state, name, u, other)
+        moves += 1
+        for route in changed:
+            state.refresh(route)
+            # 受影响路线上的节点重新检查
+            for node in state.routes[route][1:-1]:
+                if not queued[node]:
+                    queued[node] = True
+                    active.append(node)
+    return state.routes
+
+
+def polish(data, solution, objective='distance', **options):
+    """对求解器给出的 Solution 做一次局部搜索打磨，返回新的 Solution。"""
+    routes = improve(data, [route.nodes for route in solution.routes], objective, **options)
+    return make_solution(prepare_data(data), routes, objective)
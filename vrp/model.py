@@ -0,0 +1,81 @@
+"""构建 OR-Tools 路由模型的公共部分。
+
+距离和需求都通过 RegisterTransitMatrix / RegisterUnaryTransitVector 注册，
+由 C++ 直接查表，搜索过程中不再回调 Python。
+"""
+import numpy as np
+from ortools.constraint_solver import pywrapcp
+
+
+# 车型成本相关的可选字段：每辆车的成本倍率和固定成本
+VEHICLE_KEYS = ('vehicle_rates', 'fixed_costs')
+
+
+def vehicle_capacities(data):
+    """取车辆容量，兼容 'vehicle_capacities' 与 'vehicle_capacity' 两种键名。"""
+    if 'vehicle_capacities' in data:
+        return data['vehicle_capacities']
+    return data['vehicle_capacity']
+
+
+def register_distance_matrix(routing, distance_matrix):
+    """注册距离矩阵，返回转移回调的索引。"""
+    # 浮点距离应先经 vrp.precision 缩放为整数，否则会按 int64 截断
+    matrix = np.asarray(distance_matrix, dtype=np.int64)
+    return routing.RegisterTransitMatrix(matrix.tolist())
+
+
+def register_demands(routing, demands):
+    """注册每个节点的需求量，返回一元转移回调的索引。"""
+    return routing.RegisterUnaryTransitVector(np.asarray(demands, dtype=np.int64).tolist())
+
+
+def add_capacity_dimension(routing, demands, capacities):
+    """添加车辆容量约束，返回 'Capacity' 维度。"""
+    demand_callback_index = register_demands(routing, demands)
+    routing.AddDimensionWithVehicleCapacity(
+        demand_callback_index,
+        0,  # null capacity slack
+        [int(capacity) for capacity in capacities],  # vehicle maximum capacities
+        True,  # start cumul to zero
+        'Capacity')
+    return routing.GetDimensionOrDie('Capacity')
+
+
+def vehicle_classes(rates):
+    """按每公里费率给车辆分类，返回 (各类的费率, 每辆车所属的类)。"""
+    return np.unique(np.asarray(rates, dtype=np.float64), return_inverse=True)
+
+
+def set_vehicle_costs(routing, class_matrices, vehicle_class, fixed_costs=None):
+    """每个车型只注册一个成本矩阵，再按车辆指定弧成本和固定成本。
+
+    class_matrices 为各车型（已缩放为整数）的成本矩阵，vehicle_class 为每辆车的车型编号。
+    """
+    indices = [register_distance_matrix(routing, matrix) for matrix in class_matrices]
+    for vehicle, vehicle_type in enumerate(np.asarray(vehicle_class).tolist()):
+        routing.SetArcCostEvaluatorOfVehicle(indices[vehicle_type], vehicle)
+    if fixed_costs is not None:
+        for vehicle, cost in enumerate(np.asarray(fixed_costs, dtype=np.int64).tolist()):
+            routing.SetFixedCostOfVehicle(cost, vehicle)
+    return indices
+
+
+def build_routing_model(data, cost_matrix=None):
+    """创建索引管理器和路由模型，注册距离与容量约束。
+
+    cost_matrix 不为空时用它作为弧的成本，否则以距离为成本。
+    返回 (manager, routing, transit_callback_index)，其中的回调索引始终是距离。
+    """
+    manager = pywrapcp.RoutingIndexManager(len(data['distance_matrix']),
+                                           data['num_vehicles'], data['depot'])
+    routing = pywrapcp.RoutingModel(manager)
+
+    transit_callback_index = register_distance_matrix(routing, data['distance_matrix'])
+    if cost_matrix is None or cost_matrix is data['distance_matrix']:
+        routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
+    else:
+        routing.SetArcCostEvaluatorOfAllVehicles(register_distance_matrix(routing, cost_matrix))
+
+    add_capacity_dimension(routing, data['demands'], vehicle_capacities(data))
+    return manager, routing, transit_callback_index
@@ -0,0 +1,176 @@
+"""组合搜索：多个首解策略 / 元启发式 / 随机种子在多个进程中并行竞速。
+
+各进程求解同一个实例，通过共享内存中的数值交换当前最好的目标值。
+一个配置在 grace 秒后仍明显落后于全局最好解，并且 patience 秒内没有改进，
+就会提前取消，把 CPU 让给其他配置。配置多于进程数时，排队的配置开始时
+只用剩余的时间，整体不超过 time_limit。每次运行的结果可以追加到胜出日志中，
+用于调整默认的配置组合。
+
+路由求解器没有随机种子，种子只扰动 GLS 的惩罚系数，所以只对
+GUIDED_LOCAL_SEARCH 的配置起作用；其他配置的种子会被忽略，重复的配置只运行一次。
+"""
+import json
+import math
+import os
+import random
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+from ortools.constraint_solver import routing_enums_pb2
+
+from vrp.precision import to_real
+from vrp.solver import (build_model, extract_routes, make_solution, prepare_data,
+                        search_parameters)
+
+Config = namedtuple('Config', ['first_solution_strategy', 'local_search_metaheuristic', 'seed'])
+RunResult = namedtuple('RunResult', ['config', 'solution', 'elapsed', 'cancelled'])
+
+DEFAULT_PORTFOLIO = [
+    Config('PATH_CHEAPEST_ARC', 'GUIDED_LOCAL_SEARCH', None),
+    Config('SAVINGS', 'GUIDED_LOCAL_SEARCH', None),
+    Config('PARALLEL_CHEAPEST_INSERTION', 'GUIDED_LOCAL_SEARCH', None),
+    Config('PATH_CHEAPEST_ARC', 'SIMULATED_ANNEALING', None),
+    Config('CHRISTOFIDES', 'TABU_SEARCH', None),
+    Config('PATH_CHEAPEST_ARC', 'GUIDED_LOCAL_SEARCH', 1),
+    Config('SAVINGS', 'GUIDED_LOCAL_SEARCH', 2),
+    Config('GLOBAL_CHEAPEST_ARC', 'GUIDED_LOCAL_SEARCH', 3),
+]
+
+_shared_best = None
+
+
+def config_name(config):
+    """配置的简短名称，用于日志。"""
+    name = f'{config.first_solution_strategy}/{config.local_search_metaheuristic}'
+    if config.seed is not None:
+        name += f'/seed={config.seed}'
+    return name
+
+
+def seed_parameters(parameters, seed):
+    """按种子扰动 GLS 的惩罚系数；seed 为 None 或元启发式不是 GLS 时不做修改。"""
+    if seed is not None and uses_seed(parameters.local_search_metaheuristic):
+        # 路由求解器没有随机种子参数，这里用种子扰动 GLS 的惩罚系数来分散搜索
+        parameters.guided_local_search_lambda_coefficient = (
+            random.Random(seed).uniform(0.05, 0.2))
+    return parameters
+
+
+def uses_seed(metaheuristic):
+    """种子是否对该元启发式（枚举名或枚举值）起作用，目前只有 GLS。"""
+    if isinstance(metaheuristic, str):
+        return metaheuristic == 'GUIDED_LOCAL_SEARCH'
+    return metaheuristic == routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+
+
+def distinct_configs(configs):
+    """去掉不起作用的种子后按顺序去重，避免重复的配置白白占用进程。"""
+    result = []
+    for config in configs:
+        if not uses_seed(config.local_search_metaheuristic):
+            config = config._replace(seed=None)
+        if config not in result:
+            result.append(config)
+    return result
+
+
+def _init_worker(shared_best):
+    global _shared_best
+    _shared_best = shared_best
+
+
+def _run_config(data, objective, config, deadline, grace, patience, tolerance):
+    model = build_model(data, objective)
+    routing = model.routing
+    # 排队等待的配置只用剩余的时间，预算用完时不再启动
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        return RunResult(config, None, 0.0, True)
+    parameters = search_parameters(
+        config.first_solution_strategy, config.local_search_metaheuristic, remaining)
+    seed_parameters(parameters, config.seed)
+    start = time.perf_counter()
+    state = {'best': math.inf, 'improved': start, 'cancelled': False}
+
+    def at_solution():
+        now = time.perf_counter()
+        cost = routing.CostVar().Value()
+        if cost < state['best']:
+            state['best'] = cost
+            state['improved'] = now
+            with _shared_best.get_lock():
+                if cost < _shared_best.value:
+                    _shared_best.value = cost
+        elif (now - start > grace and now - state['improved'] > patience
+              and state['best'] > _shared_best.value * (1 + tolerance)):
+            state['cancelled'] = True
+            routing.CancelSearch()
+
+    routing.AddAtSolutionCallback(at_solution)
+    assignment = routing.SolveWithParameters(parameters)
+    elapsed = time.perf_counter() - start
+    solution = None
+    if assignment:
+        routes = extract_routes(data, model.manager, routing, assignment)
+        solution = make_solution(data, routes, objective,
+                                 to_real(assignment.ObjectiveValue(), model.cost_scale))
+    return RunResult(config, solution, elapsed, state['cancelled'])
+
+
+def solve_portfolio(data, configs=None, objective='distance', time_limit=10,
+                    max_workers=None, grace=None, patience=None, tolerance=0.01,
+                    win_log=None):
+    """在同一个实例上并行运行多个配置，返回 (最好的结果, 所有配置的结果)。
+
+    time_limit 是整体的时间预算：配置多于 max_workers 时，后开始的配置只用剩余的时间，
+    开始时预算已经用完的配置不运行（记为已取消）。不起作用的种子先由 distinct_configs 去掉。
+    grace、patience 默认分别为 time_limit 的 20% 和 10%。
+    win_log 不为空时，把本次每个配置的结果追加到该 JSONL 文件。
+    """
+    configs = distinct_configs(configs or DEFAULT_PORTFOLIO)
+    max_workers = max_workers or min(len(configs), os.cpu_count())
+    grace = time_limit * 0.2 if grace is None else grace
+    patience = time_limit * 0.1 if patience is None else patience
+    data = prepare_data(data)
+
+    context = get_context()
+    shared_best = context.Value('d', math.inf)
+    results = []
+    deadline = time.time() + time_limit
+    with ProcessPoolExecutor(max_workers, context, _init_worker, (shared_best,)) as executor:
+        futures = [executor.submit(_run_config, data, objective, config, deadline,
+                                   grace, patience, tolerance)
+                   for config in configs]
+        for future in as_completed(futures):
+            results.append(future.result())
+
+    solved = [result for result in results if result.solution is not None]
+    best = min(solved, key=lambda result: result.solution.objective, default=None)
+    if win_log is not None:
+        write_win_log(win_log, best, results)
+    return best, results
+
+
+def write_win_log(path, best, results):
+    """把每个配置的结果追加到胜出日志。"""
+    with open(path, 'a', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps({
+                'config': config_name(result.config),
+                'won': result is best,
+                'objective': result.solution.objective if result.solution else None,
+                'elapsed': round(result.elapsed, 3),
+                'cancelled': result.cancelled,
+            }) + '\n')
+
+
+def win_counts(path):
+    """统计胜出日志中每个配置的胜出次数。"""
+    counts = Counter()
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            counts[record['config']] += record['won']
+    return counts
@@ -0,0 +1,58 @@
+"""把浮点距离/成本缩放为整数，供 OR-Tools 精确计算。
+
+OR-Tools 的转移值都是 int64，直接传浮点数会被截断（16.5 变成 16），
+求解器优化的就不是真实的目标。这里自动选一个 10 的幂作为缩放系数，
+把矩阵转换为连续的整数数组，并检查是否会溢出。
+"""
+import numpy as np
+
+INT64_MAX = np.iinfo(np.int64).max
+
+
+def choose_scale(values, max_decimals=3, atol=1e-6):
+    """选择最小的 10 的幂，使 values × scale 都是整数（最多 max_decimals 位小数）。"""
+    values = np.asarray(values, dtype=np.float64)
+    for decimals in range(max_decimals + 1):
+        scale = 10 ** decimals
+        scaled = values * scale
+        if np.all(np.abs(scaled - np.rint(scaled)) <= atol * scale):
+            return scale
+    return 10 ** max_decimals
+
+
+def scale_values(values, scale, dtype=np.int64):
+    """按 scale 放大并四舍五入，返回连续的整数数组；超出 dtype 范围时抛出 OverflowError。"""
+    scaled = np.rint(np.asarray(values, dtype=np.float64) * scale)
+    info = np.iinfo(dtype)
+    # int64 的上限 2**63 - 1 转成浮点数会变成 2**63，必须用 >= 比较上限加一
+    if scaled.size and (scaled.max() >= float(info.max) + 1 or scaled.min() < info.min):
+        raise OverflowError(f'缩放 {scale} 倍后超出 {np.dtype(dtype).name} 的范围')
+    return np.ascontiguousarray(scaled, dtype=dtype)
+
+
+def check_route_total(scaled_matrix, limit=INT64_MAX):
+    """检查最坏情况下（每个节点都走最长的出边）的路线总长是否会溢出。"""
+    worst = float(np.asarray(scaled_matrix, dtype=np.float64).max(axis=1).sum())
+    if worst > limit:
+        raise OverflowError(f'路线总长最多可达 {worst:.0f}，超过上限 {limit}')
+
+
+def scale_capacity(capacity, scale, limit=INT64_MAX):
+    """把维度的容量（例如最大行驶距离）换算到缩放后的单位。"""
+    scaled = int(round(capacity * scale))
+    if scaled > limit:
+        raise OverflowError(f'容量 {capacity} 缩放 {scale} 倍后超过上限 {limit}')
+    return scaled
+
+
+def scale_matrix(matrix, max_decimals=3, dtype=np.int64):
+    """自动选择缩放系数并转换矩阵，返回 (整数矩阵, scale)。"""
+    scale = choose_scale(matrix, max_decimals)
+    scaled = scale_values(matrix, scale, dtype)
+    check_route_total(scaled)
+    return scaled, scale
+
+
+def to_real(value, scale):
+    """把缩放后的整数换算回真实单位。"""
+    return value / scale
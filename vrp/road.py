@@ -0,0 +1,378 @@
+"""路网距离：在本地路网上计算站点之间的最短路距离矩阵，完全离线。
+
+路网以 CSR 数组保存在 .npz 文件里（indptr、indices、weights 和路网节点的 coordinates），
+可以由 OSM 等数据的边表离线转换（from_edges + save_graph）。站点先吸附到最近的路网节点，
+再从每个站点出发做 Dijkstra，按批分给进程池；也可以先对路网做收缩层次
+（contraction hierarchy）预处理，再用桶算法做多对多查询，预处理结果可以保存复用。
+结果与 vrp.distance.distance_matrix 的格式相同，可直接交给求解器。
+
+导入本模块后注册为 METRICS['road']，未传 graph 时读取环境变量 VRP_ROAD_GRAPH 指定的路网。
+MatrixStore 的键不包含路网本身，换路网时请使用不同的缓存目录。
+
+用法：python -m vrp.road GRAPH.npz INSTANCE [--hierarchy CH.npz] [--workers 4] [-o matrix.npy]
+"""
+import argparse
+import heapq
+import math
+import os
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from vrp.distance import METRICS, as_coordinates
+from vrp.instances import load_instance
+
+# 收缩时每次见证搜索最多确定的节点数；超过后直接加捷径（多几条边，但结果仍然正确）
+WITNESS_LIMIT = 64
+# 吸附时平均每个网格的路网节点数
+SNAP_CELL_NODES = 4
+
+RoadGraph = namedtuple('RoadGraph', ['indptr', 'indices', 'weights', 'coordinates'])
+Hierarchy = namedtuple('Hierarchy', ['rank', 'up_indptr', 'up_indices', 'up_weights',
+                                     'down_indptr', 'down_indices', 'down_weights'])
+
+_graph = None
+
+
+def from_edges(num_nodes, sources, targets, weights, coordinates, bidirectional=False):
+    """由边表构造 RoadGraph。重复的边只保留最短的一条，bidirectional 时每条边都加反向边。"""
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.float64)
+    if bidirectional:
+        sources, targets = np.concatenate([sources, targets]), np.concatenate([targets, sources])
+        weights = np.concatenate([weights, weights])
+    keep = sources != targets
+    sources, targets, weights = sources[keep], targets[keep], weights[keep]
+    order = np.lexsort((weights, targets, sources))
+    sources, targets, weights = sources[order], targets[order], weights[order]
+    first = np.ones(len(sources), dtype=bool)
+    first[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+    sources, targets, weights = sources[first], targets[first], weights[first]
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=num_nodes), out=indptr[1:])
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    if coordinates.shape != (num_nodes, 2):
+        raise ValueError(f'路网节点坐标的形状应为 {(num_nodes, 2)}，实际为 {coordinates.shape}')
+    return RoadGraph(indptr, targets, weights, coordinates)
+
+
+def save_graph(path, graph):
+    np.savez(path, **graph._asdict())
+
+
+def load_graph(path):
+    """读取 save_graph 保存的路网。"""
+    with np.load(path) as arrays:
+        graph = RoadGraph(*(arrays[name] for name in RoadGraph._fields))
+    if len(graph.indptr) != len(graph.coordinates) + 1:
+        raise ValueError(f'{path} 的 indptr 长度与节点数不一致')
+    return graph
+
+
+def save_hierarchy(path, hierarchy):
+    np.savez(path, **hierarchy._asdict())
+
+
+def load_hierarchy(path):
+    with np.load(path) as arrays:
+        return Hierarchy(*(arrays[name] for name in Hierarchy._fields))
+
+
+def snap(graph, points):
+    """把每个点吸附到最近的路网节点，返回 (节点编号, 直线偏移距离)。"""
+    coords = graph.coordinates
+    points = as_coordinates(points)
+    origin = coords.min(axis=0)
+    extent = np.ptp(coords, axis=0).max() or 1.0
+    cell = extent / max(1.0, math.sqrt(len(coords) / SNAP_CELL_NODES))
+    cells = np.floor((coords - origin) / cell).astype(np.int64)
+    order = np.lexsort((cells[:, 1], cells[:, 0]))
+    keys, starts = np.unique(cells[order], axis=0, return_index=True)
+    buckets = dict(zip(map(tuple, keys.tolist()), np.split(order, starts[1:])))
+    top = cells.max(axis=0)
+
+    def square(cx, cy, radius):
+        found = [buckets[(x, y)]
+                 for x in range(cx - radius, cx + radius + 1)
+                 for y in range(cy - radius, cy + radius + 1)
+                 if (x, y) in buckets]
+        return np.concatenate(found) if found else None
+
+    # 图外的点按最近的网格处理
+    point_cells = np.clip(np.floor((points - origin) / cell).astype(np.int64), 0, top)
+    nodes = np.empty(len(points), dtype=np.int64)
+    offsets = np.empty(len(points), dtype=np.float64)
+    for i, (cx, cy) in enumerate(point_cells.tolist()):
+        radius = 0
+        candidates = square(cx, cy, radius)
+        while candidates is None:
+            radius += 1
+            candidates = square(cx, cy, radius)
+        distances = np.hypot(*(coords[candidates] - points[i]).T)
+        # 方形范围外的节点距离至少为 radius * cell，不够时扩大范围再找一次
+        needed = int(math.ceil(distances.min() / cell))
+        if needed > radius:
+            candidates = square(cx, cy, needed)
+            distances = np.hypot(*(coords[candidates] - points[i]).T)
+        best = int(np.argmin(distances))
+        nodes[i], offsets[i] = candidates[best], distances[best]
+    return nodes, offsets
+
+
+def _dijkstra(indptr, indices, weights, source, targets):
+    # 找到所有目标后提前结束；到不了的目标为 inf
+    dist = {source: 0.0}
+    settled = set()
+    remaining = set(targets)
+    heap = [(0.0, source)]
+    while heap and remaining:
+        d, u = heapq.heappop(heap)
+        if u in settled:
+            continue
+        settled.add(u)
+        remaining.discard(u)
+        for i in range(indptr[u], indptr[u + 1]):
+            v = indices[i]
+            length = d + weights[i]
+            if length < dist.get(v, math.inf):
+                dist[v] = length
+                heapq.heappush(heap, (length, v))
+    return [dist[t] if t in settled else math.inf for t in targets]
+
+
+def _init_worker(indptr, indices, weights):
+    # 每个工作进程只接收一次路网，转成列表后逐条访问比 NumPy 标量快得多
+    global _graph
+    _graph = indptr.tolist(), indices.tolist(), weights.tolist()
+
+
+def _rows(sources, targets):
+    return [_dijkstra(*_graph, source, targets) for source in sources]
+
+
+def shortest_path_matrix(graph, sources, targets=None, max_workers=None, batch_size=16):
+    """从每个源点做 Dijkstra，返回 (len(sources), len(targets)) 的距离矩阵，到不了为 inf。
+
+    源点按 batch_size 分批交给进程池；max_workers=1 时在当前进程计算。
+    """
+    sources = np.asarray(sources, dtype=np.int64).tolist()
+    targets = sources if targets is None else np.asarray(targets, dtype=np.int64).tolist()
+    batches = [sources[start:start + batch_size] for start in range(0, len(sources), batch_size)]
+    max_workers = max_workers or os.cpu_count()
+    if max_workers == 1 or len(batches) == 1:
+        _init_worker(graph.indptr, graph.indices, graph.weights)
+        rows = [row for batch in batches for row in _rows(batch, targets)]
+    else:
+        with ProcessPoolExecutor(max_workers, initializer=_init_worker,
+                                 initargs=(graph.indptr, graph.indices, graph.weights)) as pool:
+            rows = [row for result in pool.map(_rows, batches, [targets] * len(batches))
+                    for row in result]
+    return np.array(rows, dtype=np.float64).reshape(len(sources), len(targets))
+
+
+def _witness(out, source, skip, targets, limit, settle_limit):
+    # 不经过 skip、长度不超过 limit 的最短路，确定了所有 targets 或 settle_limit 个节点后结束
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    remaining = len(targets)
+    settled = 0
+    while heap and remaining and settled < settle_limit:
+        d, u = heapq.heappop(heap)
+        if d > limit:
+            break
+        if d > dist[u]:
+            continue
+        settled += 1
+        remaining -= u in targets
+        for v, weight in out[u].items():
+            length = d + weight
+            if v != skip and length < dist.get(v, math.inf):
+                dist[v] = length
+                heapq.heappush(heap, (length, v))
+    return dist
+
+
+def _to_csr(adjacency):
+    indptr = np.zeros(len(adjacency) + 1, dtype=np.int64)
+    np.cumsum([len(edges) for edges in adjacency], out=indptr[1:])
+    indices = np.fromiter((v for edges in adjacency for v in edges), np.int64, indptr[-1])
+    weights = np.fromiter((w for edges in adjacency for w in edges.values()), np.float64,
+                          indptr[-1])
+    return indptr, indices, weights
+
+
+def contract(graph, witness_limit=WITNESS_LIMIT):
+    """收缩层次预处理，返回 Hierarchy。
+
+    按边差（新增捷径数减去删除的边数，加上已收缩的邻居数）从小到大惰性地收缩节点；
+    up_* 为每个节点指向更高层节点的边，down_* 为从更高层节点指向它的边（按反向存储）。
+    预处理是纯 Python 的，较大的路网需要几分钟，应当用 save_hierarchy 保存后反复使用。
+    """
+    num_nodes = len(graph.indptr) - 1
+    out = [{} for _ in range(num_nodes)]
+    inc = [{} for _ in range(num_nodes)]
+    indptr, indices, weights = (graph.indptr.tolist(), graph.indices.tolist(),
+                                graph.weights.tolist())
+    for u in range(num_nodes):
+        for i in range(indptr[u], indptr[u + 1]):
+            v, weight = indices[i], weights[i]
+            if v != u and weight < out[u].get(v, math.inf):
+                out[u][v] = weight
+                inc[v][u] = weight
+
+    def shortcuts(v):
+        found = []
+        for u, first in inc[v].items():
+            lengths = {w: first + second for w, second in out[v].items() if w != u}
+            if not lengths:
+                continue
+            dist = _witness(out, u, v, lengths, max(lengths.values()), witness_limit)
+            found += [(u, w, length) for w, length in lengths.items()
+                      if dist.get(w, math.inf) > length]
+        return found
+
+    contracted = [0] * num_nodes
+
+    def priority(v, added):
+        return len(added) - len(inc[v]) - len(out[v]) + contracted[v]
+
+    heap = [(priority(v, shortcuts(v)), v) for v in range(num_nodes)]
+    heapq.heapify(heap)
+    rank = np.empty(num_nodes, dtype=np.int64)
+    up, down = [None] * num_nodes, [None] * num_nodes
+    order = 0
+    while heap:
+        _, v = heapq.heappop(heap)
+        added = shortcuts(v)
+        current = priority(v, added)
+        if heap and current > heap[0][0]:
+            heapq.heappush(heap, (current, v))
+            continue
+        up[v], down[v] = out[v], inc[v]
+        for w in out[v]:
+            del inc[w][v]
+            contracted[w] += 1
+        for u in inc[v]:
+            del out[u][v]
+            contracted[u] += 1
+        for u, w, length in added:
+            if length < out[u].get(w, math.inf):
+                out[u][w] = length
+                inc[w][u] = length
+        out[v], inc[v] = {}, {}
+        rank[v] = order
+        order += 1
+    return Hierarchy(rank, *_to_csr(up), *_to_csr(down))
+
+
+def _upward(indptr, indices, weights, source):
+    # 只沿向上的边搜索，返回所有确定的节点及距离
+    dist = {source: 0.0}
+    settled = {}
+    heap = [(0.0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if u in settled:
+            continue
+        settled[u] = d
+        for i in range(indptr[u], indptr[u + 1]):
+            v = indices[i]
+            length = d + weights[i]
+            if length < dist.get(v, math.inf):
+                dist[v] = length
+                heapq.heappush(heap, (length, v))
+    return settled
+
+
+def hierarchy_matrix(hierarchy, sources, targets=None):
+    """用收缩层次做多对多查询，返回与 shortest_path_matrix 相同的矩阵。
+
+    先从每个目标向上做反向搜索，把 (目标, 距离) 记到经过节点的桶里；再从每个源点向上
+    搜索，在桶里相遇的节点处取最小和。每次搜索只涉及很少的节点，所以在当前进程计算。
+    """
+    up = [array.tolist() for array in hierarchy[1:4]]
+    down = [array.tolist() for array in hierarchy[4:7]]
+    sources = np.asarray(sources, dtype=np.int64).tolist()
+    targets = sources if targets is None else np.asarray(targets, dtype=np.int64).tolist()
+    buckets = defaultdict(list)
+    for j, target in enumerate(targets):
+        for node, d in _upward(*down, target).items():
+            buckets[node].append((j, d))
+    matrix = np.empty((len(sources), len(targets)), dtype=np.float64)
+    for i, source in enumerate(sources):
+        row = [math.inf] * len(targets)
+        for node, d in _upward(*up, source).items():
+            for j, rest in buckets.get(node, ()):
+                if d + rest < row[j]:
+                    row[j] = d + rest
+        matrix[i] = row
+    return matrix
+
+
+def road_distance_matrix(nodes, decimals=1, dtype=np.float64, block_rows=None, out=None,
+                         graph=None, hierarchy=None, max_workers=None):
+    """站点之间的路网距离矩阵，参数与 vrp.distance.distance_matrix 相同。
+
+    吸附到同一路网节点的站点距离为 0；有站点之间不连通时抛出 ValueError。
+    block_rows 只为与其他度量的接口一致，这里不使用。
+    """
+    if graph is None:
+        if 'VRP_ROAD_GRAPH' not in os.environ:
+            raise ValueError('需要传入 graph，或用环境变量 VRP_ROAD_GRAPH 指定路网文件')
+        graph = load_graph(os.environ['VRP_ROAD_GRAPH'])
+    snapped, _ = snap(graph, nodes)
+    unique, inverse = np.unique(snapped, return_inverse=True)
+    if hierarchy is not None:
+        distances = hierarchy_matrix(hierarchy, unique)
+    else:
+        distances = shortest_path_matrix(graph, unique, max_workers=max_workers)
+    matrix = distances[inverse[:, None], inverse[None, :]]
+    if not np.isfinite(matrix).all():
+        rows, cols = np.nonzero(~np.isfinite(matrix))
+        raise ValueError(f'路网上有 {len(rows)} 对站点不连通，例如 {rows[0]} -> {cols[0]}')
+    if np.issubdtype(np.dtype(dtype), np.integer):
+        np.rint(matrix, out=matrix)
+    elif decimals is not None:
+        np.round(matrix, decimals, out=matrix)
+    if out is None:
+        return matrix.astype(dtype, copy=False)
+    if out.shape != matrix.shape:
+        raise ValueError(f'out 的形状应为 {matrix.shape}，实际为 {out.shape}')
+    out[...] = matrix
+    return out
+
+
+METRICS['road'] = road_distance_matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description='由本地路网计算站点之间的距离矩阵')
+    parser.add_argument('graph', help='save_graph 保存的 .npz 路网')
+    parser.add_argument('instance', help='含 coordinates 的实例文件')
+    parser.add_argument('--hierarchy', default=None,
+                        help='收缩层次文件，不存在时先预处理并保存到该路径')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--decimals', type=int, default=1)
+    parser.add_argument('-o', '--output', default='matrix.npy')
+    args = parser.parse_args()
+
+    graph = load_graph(args.graph)
+    hierarchy = None
+    if args.hierarchy:
+        if Path(args.hierarchy).exists():
+            hierarchy = load_hierarchy(args.hierarchy)
+        else:
+            hierarchy = contract(graph)
+            save_hierarchy(args.hierarchy, hierarchy)
+    instance = load_instance(args.instance)
+    matrix = road_distance_matrix(instance['coordinates'], args.decimals, graph=graph,
+                                  hierarchy=hierarchy, max_workers=args.workers)
+    np.save(args.output, matrix)
+    print(f'{instance["name"]}: {len(matrix)} 个站点的距离矩阵已写入 {args.output}')
+
+
+if __name__ == '__main__':
+    main()
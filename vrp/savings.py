@@ -0,0 +1,155 @@
+"""Clarke-Wright 节约算法，快速构造初始可行解。
+
+节约值 s(i, j) = d(i, 0) + d(0, j) - d(i, j) 由距离矩阵仓库所在的行和列向量化算出，
+按节约值从大到小（堆）合并路线：i 必须是所在路线的最后一个客户，j 必须是另一条路线的
+第一个客户，且合并后的载重不超过容量；路线归属用并查集维护。
+得到的路线可以直接作为 OR-Tools 的初始解（ReadAssignmentFromRoutes）。
+只有坐标和 k 近邻（vrp.sparse.knn_graph）时用 knn_savings_routes，不需要距离矩阵。
+"""
+import heapq
+
+import numpy as np
+
+from vrp.distance import as_coordinates
+from vrp.local_search import nearest_neighbors
+from vrp.model import vehicle_capacities
+from vrp.solver import make_solution, prepare_data, solve
+
+DEFAULT_K = 50
+DENSE_LIMIT = 500
+
+
+def savings_pairs(matrix, depot=0, neighbors=None):
+    """计算正的节约值，返回 (savings, i, j)。
+
+    neighbors 不为空时只考虑每个节点与其近邻之间的弧，内存为 O(n·k)。
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    num_nodes = len(matrix)
+    if neighbors is None:
+        i, j = np.nonzero(~np.eye(num_nodes, dtype=bool))
+    else:
+        i = np.repeat(np.arange(num_nodes), neighbors.shape[1])
+        j = neighbors.ravel()
+    keep = (i != depot) & (j != depot) & (i != j)
+    i, j = i[keep], j[keep]
+    savings = matrix[i, depot] + matrix[depot, j] - matrix[i, j]
+    positive = savings > 0
+    return savings[positive], i[positive], j[positive]
+
+
+def savings_routes(data, capacity=None, k=None):
+    """节约算法得到的路线（客户节点列表，不含仓库）。
+
+    capacity 默认取最大的车辆容量；k 不为空时只在 k 近邻之间合并，
+    节点数超过 DENSE_LIMIT 时默认用 DEFAULT_K 个近邻。
+    """
+    data = prepare_data(data)
+    matrix = data['distance_matrix']
+    demands = data['demands'].tolist()
+    depot = data['depot']
+    if capacity is None:
+        capacity = max(data['vehicle_capacities'])
+    if k is None and len(matrix) > DENSE_LIMIT:
+        k = DEFAULT_K
+    neighbors = None
+    if k is not None and k < len(matrix) - 2:
+        neighbors = nearest_neighbors(matrix, k, depot)
+    savings, from_nodes, to_nodes = savings_pairs(matrix, depot, neighbors)
+    return merge_routes(savings, from_nodes, to_nodes, demands, depot, capacity)
+
+
+def knn_savings_routes(nodes, demands, capacity, neighbors, distances, depot=0):
+    """只用坐标和 k 近邻图（vrp.sparse.knn_graph 的结果）的节约算法，内存为 O(n·k)。
+
+    到仓库的距离由坐标直接算出，客户之间只考虑近邻弧。返回的路线同 savings_routes。
+    """
+    coords = as_coordinates(nodes)
+    to_depot = np.hypot(*(coords - coords[depot]).T)
+    i = np.repeat(np.arange(len(coords)), neighbors.shape[1])
+    j = neighbors.ravel()
+    savings = to_depot[i] + to_depot[j] - distances.ravel()
+    keep = (i != depot) & (j != depot) & (savings > 0)
+    return merge_routes(savings[keep], i[keep], j[keep],
+                        np.asarray(demands, dtype=np.int64).tolist(), depot, capacity)
+
+
+def merge_routes(savings, from_nodes, to_nodes, demands, depot, capacity):
+    """按节约值从大到小合并路线，返回客户节点列表（不含仓库）。demands 为列表。"""
+    heap = list(zip((-savings).tolist(), from_nodes.tolist(), to_nodes.tolist()))
+    heapq.heapify(heap)
+
+    num_nodes = len(demands)
+    parent = list(range(num_nodes))
+    size = [1] * num_nodes
+    first = list(range(num_nodes))
+    last = list(range(num_nodes))
+    load = list(demands)
+    successor = [-1] * num_nodes
+
+    def find(node):
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    while heap:
+        _, a, b = heapq.heappop(heap)
+        ra, rb = find(a), find(b)
+        if ra == rb or last[ra] != a or first[rb] != b or load[ra] + load[rb] > capacity:
+            continue
+        successor[a] = b
+        root, child = (ra, rb) if size[ra] >= size[rb] else (rb, ra)
+        parent[child] = root
+        size[root] += size[child]
+        first[root], last[root] = first[ra], last[rb]
+        load[root] = load[ra] + load[rb]
+
+    routes = []
+    for node in range(num_nodes):
+        if node != depot and find(node) == node:
+            route = []
+            current = first[node]
+            while current != -1:
+                route.append(current)
+                current = successor[current]
+            routes.append(route)
+    return routes
+
+
+def assign_vehicles(data, routes):
+    """把路线分给车辆：载重大的路线配容量大的车，放不下时返回 None。"""
+    capacities = np.asarray(vehicle_capacities(data))
+    demands = np.asarray(data['demands'], dtype=np.int64)
+    if len(routes) > len(capacities):
+        return None
+    loads = np.array([demands[route].sum() for route in routes], dtype=np.int64)
+    vehicles = np.argsort(-capacities, kind='stable')
+    assigned = [[] for _ in capacities]
+    for route, vehicle in zip(np.argsort(-loads, kind='stable'), vehicles):
+        if loads[route] > capacities[vehicle]:
+            return None
+        assigned[vehicle] = routes[route]
+    return assigned
+
+
+def initial_routes(data, k=None):
+    """节约算法得到的每辆车的初始路线，不可行（车不够）时返回 None。"""
+    return assign_vehicles(data, savings_routes(data, k=k))
+
+
+def savings_solution(data, objective='distance', k=None):
+    """不经过 OR-Tools，直接返回节约算法的 Solution；车不够时返回 None。"""
+    data = prepare_data(data)
+    routes = initial_routes(data, k)
+    if routes is None:
+        return None
+    depot = data['depot']
+    return make_solution(data, [[depot] + route + [depot] for route in routes], objective)
+
+
+def solve_savings(data, k=None, **options):
+    """以节约算法的结果为初始解求解，options 原样传给 vrp.solver.solve。"""
+    return solve(data, initial_routes=initial_routes(data, k), **options)
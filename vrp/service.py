@@ -0,0 +1,357 @@
+"""常驻的求解服务（HTTP，可监听 TCP 端口或 Unix 套接字）。
+
+- 进程池在启动时预热，求解请求不再付出导入 OR-Tools 和启动进程的开销；
+- 实例按内容哈希缓存：主进程缓存解析好的数据，客户端可以只传 instance_id；
+  每个工作进程缓存建好的模型（索引管理器、已注册的矩阵），同一实例再次求解时直接复用；
+- 请求按 (priority, deadline) 排队，time_limit 不超过截止时间的剩余时间；
+  两者都没有给出时使用服务的默认时间限制，避免元启发式一直占着工作进程；
+- 未知的策略名或目标函数在请求到达时就返回 400；
+- GET /metrics 返回请求数、缓存命中和延迟的 p50/p99。
+
+接口：
+    POST /instances           请求体为实例 JSON，返回 {"instance_id": ...}
+    POST /solve?参数          请求体为实例 JSON，或用 ?instance_id= 引用已上传的实例；
+                              参数有 time_limit、deadline（秒）、priority（越小越先）、
+                              objective、first_solution_strategy、local_search_metaheuristic
+    GET  /metrics
+
+用法：python -m vrp.service --port 8080 --workers 4 [--default-time-limit 30]   或   --socket /tmp/vrp.sock
+"""
+import argparse
+import hashlib
+import heapq
+import http.client
+import itertools
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import numpy as np
+
+from vrp.batch import solution_to_dict
+from vrp.distance import distance_matrix
+from vrp.instances import parse_instance
+from vrp.precision import to_real
+from vrp.solver import (build_model, extract_routes, get_objective, make_solution,
+                        prepare_data, search_parameters, solve_model)
+
+# 截止时间前预留给建模和返回结果的时间（秒）
+DEADLINE_MARGIN = 0.2
+# 请求既没有 time_limit 也没有 deadline 时的时间限制（秒）
+DEFAULT_TIME_LIMIT = 30
+# 每个工作进程缓存的模型个数、主进程缓存的实例个数
+MODEL_CACHE = 8
+INSTANCE_CACHE = 256
+# 计算延迟分位数时保留的最近请求数
+LATENCY_WINDOW = 10000
+
+SOLVE_OPTIONS = ('objective', 'first_solution_strategy', 'local_search_metaheuristic')
+
+_models = OrderedDict()
+
+
+def _jsonable(value):
+    # NumPy 数组和标量转换为 JSON 能表示的值
+    return np.asarray(value).tolist()
+
+
+def instance_key(data):
+    """按实例内容计算的哈希，作为缓存的键。"""
+    digest = hashlib.sha1()
+    for key in sorted(data):
+        if key == 'name':
+            continue
+        value = data[key]
+        digest.update(key.encode())
+        if isinstance(value, np.ndarray):
+            digest.update(str(value.dtype).encode() + str(value.shape).encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+        else:
+            digest.update(json.dumps(value, default=_jsonable).encode())
+    return digest.hexdigest()
+
+
+def _warm():
+    # 在工作进程中建一个很小的模型，提前完成 OR-Tools 的导入和初始化
+    data = {'distance_matrix': [[0, 1], [1, 0]], 'demands': [0, 1], 'vehicle_capacities': [1]}
+    solve_model(build_model(prepare_data(data)), search_parameters())
+
+
+def _solve(key, data, objective, strategy, metaheuristic, time_limit):
+    model_key = (key, objective)
+    model = _models.pop(model_key, None)
+    cached = model is not None
+    if model is None:
+        model = build_model(data, objective)
+    _models[model_key] = model
+    while len(_models) > MODEL_CACHE:
+        _models.popitem(last=False)
+    assignment = solve_model(model, search_parameters(strategy, metaheuristic, time_limit))
+    if not assignment:
+        return None, cached
+    routes = extract_routes(data, model.manager, model.routing, assignment)
+    objective_value = to_real(assignment.ObjectiveValue(), model.cost_scale)
+    return make_solution(data, routes, objective, objective_value), cached
+
+
+class SolverService:
+    """排队、缓存和调度求解请求，不涉及网络。"""
+
+    def __init__(self, max_workers=None, default_time_limit=DEFAULT_TIME_LIMIT):
+        self.max_workers = max_workers or os.cpu_count()
+        self.default_time_limit = default_time_limit
+        self.executor = ProcessPoolExecutor(self.max_workers)
+        for future in [self.executor.submit(_warm) for _ in range(self.max_workers)]:
+            future.result()
+        self.instances = OrderedDict()
+        self.queue = []
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.counts = {'requests': 0, 'solved': 0, 'infeasible': 0, 'expired': 0,
+                       'instance_hits': 0, 'model_hits': 0}
+        self.closed = False
+        self.dispatchers = [threading.Thread(target=self._dispatch, daemon=True)
+                            for _ in range(self.max_workers)]
+        for thread in self.dispatchers:
+            thread.start()
+
+    def add_instance(self, instance):
+        """缓存实例，返回它的 instance_id。"""
+        if 'distance_matrix' not in instance:
+            instance['distance_matrix'] = distance_matrix(instance['coordinates'])
+        data = prepare_data(instance)
+        key = instance_key(data)
+        with self.condition:
+            if key in self.instances:
+                self.counts['instance_hits'] += 1
+            self.instances[key] = data
+            self.instances.move_to_end(key)
+            while len(self.instances) > INSTANCE_CACHE:
+                self.instances.popitem(last=False)
+        return key
+
+    def submit(self, key, priority=0, deadline=None, time_limit=None, **options):
+        """把请求放入队列，返回 Future，结果为 (solution, 耗时信息)。
+
+        未知的策略名或目标函数抛出 ValueError，不进入队列。
+        """
+        get_objective(options.get('objective', 'distance'))
+        search_parameters(options.get('first_solution_strategy', 'PATH_CHEAPEST_ARC'),
+                          options.get('local_search_metaheuristic'))
+        with self.condition:
+            if key not in self.instances:
+                raise KeyError(f'未知的 instance_id：{key}')
+            self.counts['requests'] += 1
+            future = Future()
+            received = time.monotonic()
+            expires = received + deadline if deadline is not None else float('inf')
+            heapq.heappush(self.queue, (priority, expires, next(self.sequence),
+                                        (key, time_limit, options, received, future)))
+            self.condition.notify()
+        return future
+
+    def _dispatch(self):
+        while True:
+            with self.condition:
+                while not self.queue and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                _, expires, _, (key, time_limit, options, received, future) = (
+                    heapq.heappop(self.queue))
+                data = self.instances.get(key)
+            started = time.monotonic()
+            remaining = expires - started - DEADLINE_MARGIN
+            if remaining <= 0 or data is None:
+                with self.condition:
+                    self.counts['expired'] += 1
+                future.set_exception(TimeoutError('请求在排队时已超过截止时间')
+                                     if data is not None else KeyError(key))
+                continue
+            if time_limit is None or time_limit > remaining:
+                time_limit = remaining if remaining != float('inf') else time_limit
+            if time_limit is None:
+                time_limit = self.default_time_limit
+            try:
+                solution, cached = self.executor.submit(
+                    _solve, key, data, options.get('objective', 'distance'),
+                    options.get('first_solution_strategy', 'PATH_CHEAPEST_ARC'),
+                    options.get('local_search_metaheuristic'), time_limit).result()
+            except Exception as error:
+                future.set_exception(error)
+                continue
+            finished = time.monotonic()
+            with self.condition:
+                self.counts['solved' if solution is not None else 'infeasible'] += 1
+                self.counts['model_hits'] += cached
+                self.latencies.append(finished - received)
+            future.set_result((solution, {'queued': started - received,
+                                          'solve': finished - started,
+                                          'time_limit': time_limit,
+                                          'model_cached': cached}))
+
+    def metrics(self):
+        """请求计数、队列长度和延迟分位数（秒）。"""
+        with self.condition:
+            latencies = np.array(self.latencies)
+            result = dict(self.counts, queued=len(self.queue), instances=len(self.instances))
+        if len(latencies):
+            result['p50'], result['p99'] = np.percentile(latencies, [50, 99]).tolist()
+        return result
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.executor.shutdown(cancel_futures=True)
+
+
+class Handler(BaseHTTPRequestHandler):
+    """HTTP 接口，service 由服务器对象提供。"""
+
+    def address_string(self):
+        # Unix 套接字没有客户端地址
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def _reply(self, status, body):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(length).decode('utf-8') if length else ''
+
+    def do_GET(self):
+        if urlsplit(self.path).path == '/metrics':
+            self._reply(200, self.server.service.metrics())
+        else:
+            self._reply(404, {'error': f'未知的路径 {self.path}'})
+
+    def do_POST(self):
+        try:
+            status, body = self._post()
+        except (KeyError, ValueError) as error:
+            status, body = 400, {'error': str(error)}
+        except TimeoutError as error:
+            status, body = 504, {'error': str(error)}
+        except Exception as error:
+            status, body = 500, {'error': f'{type(error).__name__}: {error}'}
+        self._reply(status, body)
+
+    def _post(self):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        service = self.server.service
+        body = self._body()
+        if url.path == '/instances':
+            return 200, {'instance_id': service.add_instance(parse_instance(body))}
+        if url.path != '/solve':
+            return 404, {'error': f'未知的路径 {url.path}'}
+        instance = parse_instance(body) if body else None
+        key = service.add_instance(instance) if instance else params['instance_id']
+        options = {name: params[name] for name in SOLVE_OPTIONS if name in params}
+        future = service.submit(
+            key, int(params.get('priority', 0)),
+            float(params['deadline']) if 'deadline' in params else None,
+            float(params['time_limit']) if 'time_limit' in params else None, **options)
+        solution, timing = future.result()
+        name = instance.get('name', key) if instance else key
+        return 200, dict(solution_to_dict(name, solution), instance_id=key, **timing)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(service, port=8080, host='127.0.0.1', socket_path=None):
+    """启动 HTTP 服务直到被中断。"""
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = UnixHTTPServer(socket_path, Handler)
+    else:
+        server = ThreadingHTTPServer((host, port), Handler)
+    server.service = service
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        service.close()
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+class Client:
+    """本地客户端：address 为 'host:port' 或 Unix 套接字的路径。"""
+
+    def __init__(self, address='127.0.0.1:8080', timeout=None):
+        self.address = address
+        self.timeout = timeout
+
+    def _request(self, method, path, body=None):
+        if os.sep in self.address:
+            connection = _UnixConnection(self.address, self.timeout)
+        else:
+            host, _, port = self.address.partition(':')
+            connection = http.client.HTTPConnection(host, int(port or 80), timeout=self.timeout)
+        try:
+            payload = None if body is None else json.dumps(body, default=_jsonable)
+            connection.request(method, path, payload,
+                               {'Content-Type': 'application/json'} if payload else {})
+            response = connection.getresponse()
+            result = json.loads(response.read())
+        finally:
+            connection.close()
+        if response.status != 200:
+            raise RuntimeError(f'{response.status}: {result.get("error")}')
+        return result
+
+    def upload(self, instance):
+        """上传实例，返回 instance_id。"""
+        return self._request('POST', '/instances', instance)['instance_id']
+
+    def solve(self, instance=None, instance_id=None, **params):
+        """求解实例（或已上传的 instance_id），params 见模块说明，返回服务的 JSON 结果。"""
+        if instance_id is not None:
+            params['instance_id'] = instance_id
+        return self._request('POST', f'/solve?{urlencode(params)}', instance)
+
+    def metrics(self):
+        return self._request('GET', '/metrics')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='常驻的 CVRP 求解服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--socket', default=None, help='监听 Unix 套接字而不是 TCP 端口')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--default-time-limit', type=float, default=DEFAULT_TIME_LIMIT,
+                        help='请求没有 time_limit 和 deadline 时的时间限制（秒）')
+    args = parser.parse_args()
+    serve(SolverService(args.workers, args.default_time_limit), args.port, args.host,
+          args.socket)
+
+
+if __name__ == '__main__':
+    main()
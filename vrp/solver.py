@@ -0,0 +1,251 @@
+"""统一的 CVRP 求解入口：建模、求解、整理结果。
+
+各脚本只需要准备数据，再选择目标函数和搜索参数：
+
+    solution = solve(data, objective='demand_distance',
+                     local_search_metaheuristic='GUIDED_LOCAL_SEARCH', time_limit=10)
+    print_solution(solution)
+"""
+from collections import namedtuple
+
+import numpy as np
+from ortools.constraint_solver import pywrapcp, routing_enums_pb2
+
+from vrp.evaluate import (arrays_to_routes, evaluate, extract_route_arrays,
+                          routes_to_arrays)
+from vrp.model import (VEHICLE_KEYS, build_routing_model, set_vehicle_costs, vehicle_capacities,
+                       vehicle_classes)
+from vrp.precision import (check_route_total, choose_scale, scale_capacity, scale_matrix,
+                           scale_values, to_real)
+from vrp.time_windows import TIME_KEYS, apply_time_windows
+
+Model = namedtuple('Model', ['manager', 'routing', 'distance_scale', 'cost_scale'])
+Route = namedtuple('Route', ['vehicle_id', 'nodes', 'distance', 'load', 'cost'])
+Solution = namedtuple('Solution', ['routes', 'distance', 'cost', 'objective'])
+
+
+def distance_cost(distance, from_demand, to_demand, rate=1.0):
+    """按距离计费：弧长 × rate。"""
+    if rate == 1:
+        return distance
+    return distance * rate
+
+
+def demand_distance_cost(distance, from_demand, to_demand, rate=1.5):
+    """按货物计费（main.py）：弧长 × 出发节点需求 × 每个货物每km 1.5 元。"""
+    return distance * from_demand * rate
+
+
+def per_demand_cost(distance, from_demand, to_demand, rate=1.5):
+    """按需求计费（mm.py）：弧长 × 到达节点需求 × 每个货物每km 1.5 元。"""
+    return distance * to_demand * rate
+
+
+OBJECTIVES = {
+    'distance': distance_cost,
+    'demand_distance': demand_distance_cost,
+    'per_demand': per_demand_cost,
+}
+
+
+def get_objective(objective):
+    """按名称取目标函数，也可以直接传入 f(距离, 起点需求, 终点需求) -> 成本。
+
+    目标函数逐元素计算，既可作用于整个矩阵（建模），也可作用于路线上的弧（评估）。
+    """
+    if callable(objective):
+        return objective
+    try:
+        return OBJECTIVES[objective]
+    except KeyError:
+        raise ValueError(f'未知的目标函数 {objective!r}，可选：{sorted(OBJECTIVES)}') from None
+
+
+def cost_matrix(objective, distance_matrix, demands):
+    """目标函数对应的成本矩阵。"""
+    return get_objective(objective)(distance_matrix, demands[:, None], demands[None, :])
+
+
+def prepare_data(data):
+    """统一数据的键名，并把距离矩阵和需求转换为 NumPy 数组。"""
+    capacities = [int(capacity) for capacity in vehicle_capacities(data)]
+    prepared = {
+        'distance_matrix': np.asarray(data['distance_matrix'], dtype=np.float64),
+        'demands': np.asarray(data['demands'], dtype=np.int64),
+        'vehicle_capacities': capacities,
+        'num_vehicles': data.get('num_vehicles', len(capacities)),
+        'depot': data.get('depot', 0),
+    }
+    # 时间窗和车型成本相关的字段原样保留，见 vrp.time_windows 与 build_model
+    prepared.update((key, data[key]) for key in TIME_KEYS + VEHICLE_KEYS
+                    if data.get(key) is not None)
+    return prepared
+
+
+def vehicle_costs(data):
+    """每辆车的成本倍率和固定成本（真实单位），没有给出时分别为 1 和 0。"""
+    num_vehicles = data['num_vehicles']
+    rates = np.asarray(data.get('vehicle_rates', np.ones(num_vehicles)), dtype=np.float64)
+    fixed = np.asarray(data.get('fixed_costs', np.zeros(num_vehicles)), dtype=np.float64)
+    if rates.shape != (num_vehicles,) or fixed.shape != (num_vehicles,):
+        raise ValueError(f'vehicle_rates 和 fixed_costs 的长度应为车辆数 {num_vehicles}')
+    return rates, fixed
+
+
+def scale_vehicle_costs(data, costs):
+    """按车型缩放成本，返回 ((各车型的成本矩阵, 每辆车的车型), 固定成本, scale)。
+
+    所有车型和固定成本共用一个缩放系数，目标值才能相加。
+    """
+    rates, fixed = vehicle_costs(data)
+    class_rates, vehicle_class = vehicle_classes(rates)
+    scale = max([choose_scale(costs * rate) for rate in class_rates] + [choose_scale(fixed)])
+    class_matrices = []
+    for rate in class_rates:
+        scaled = scale_values(costs * rate, scale)
+        check_route_total(scaled)
+        class_matrices.append(scaled)
+    return (class_matrices, vehicle_class), scale_values(fixed, scale), scale
+
+
+def build_model(data, objective='distance', max_distance=None, span_cost_coefficient=0):
+    """建立路由模型，返回 Model。
+
+    data 需先经过 prepare_data。距离和成本矩阵会各自缩放为整数，
+    Model 中记录缩放系数，用于把求解结果换算回真实单位。
+    max_distance 不为空时添加 'Distance' 维度，限制每辆车的行驶距离，
+    并按 span_cost_coefficient 平衡各车路程。
+    数据带有时间窗时添加 'Time' 维度（见 vrp.time_windows）。
+    数据带有 'vehicle_rates'（每辆车的成本倍率）或 'fixed_costs'（每辆车的固定成本）时，
+    相同倍率的车共用一个成本矩阵，见 scale_vehicle_costs。
+    """
+    costs = cost_matrix(objective, data['distance_matrix'], data['demands'])
+    distance_matrix, distance_scale = scale_matrix(data['distance_matrix'])
+    mixed_fleet = 'vehicle_rates' in data or 'fixed_costs' in data
+    if mixed_fleet:
+        class_costs, fixed_costs, cost_scale = scale_vehicle_costs(data, costs)
+        costs = distance_matrix
+    elif costs is data['distance_matrix']:
+        costs, cost_scale = distance_matrix, distance_scale
+    else:
+        costs, cost_scale = scale_matrix(costs)
+
+    scaled_data = dict(data, distance_matrix=distance_matrix)
+    manager, routing, transit_callback_index = build_routing_model(scaled_data, costs)
+    if mixed_fleet:
+        set_vehicle_costs(routing, *class_costs, fixed_costs)
+    if max_distance is not None:
+        capacity = scale_capacity(max_distance, distance_scale)
+        routing.AddDimension(transit_callback_index, 0, capacity, True, 'Distance')
+        routing.GetDimensionOrDie('Distance').SetGlobalSpanCostCoefficient(span_cost_coefficient)
+    apply_time_windows(manager, routing, data)
+    return Model(manager, routing, distance_scale, cost_scale)
+
+
+def _enum_value(enum, name, kind):
+    # 按名称取 OR-Tools 的枚举值，未知的名称抛出 ValueError
+    try:
+        return enum.Value.Value(name)
+    except ValueError:
+        raise ValueError(f'未知的{kind} {name!r}，可选：{enum.Value.keys()}') from None
+
+
+def search_parameters(first_solution_strategy='PATH_CHEAPEST_ARC',
+                      local_search_metaheuristic=None, time_limit=None):
+    """生成搜索参数，策略用枚举名表示，time_limit 单位为秒。未知的策略名抛出 ValueError。"""
+    parameters = pywrapcp.DefaultRoutingSearchParameters()
+    parameters.first_solution_strategy = _enum_value(
+        routing_enums_pb2.FirstSolutionStrategy, first_solution_strategy, '首解策略')
+    if local_search_metaheuristic is not None:
+        parameters.local_search_metaheuristic = _enum_value(
+            routing_enums_pb2.LocalSearchMetaheuristic, local_search_metaheuristic, '元启发式')
+    if time_limit is not None:
+        parameters.time_limit.FromMilliseconds(int(time_limit * 1000))
+    return parameters
+
+
+def extract_routes(data, manager, routing, assignment):
+    """取出每辆车经过的节点（含起点和终点的仓库）。"""
+    return arrays_to_routes(extract_route_arrays(manager, routing, assignment))
+
+
+def make_solution(data, routes, objective='distance', objective_value=None):
+    """根据路线计算每辆车的距离、载重和成本（使用未截断的原始距离）。
+
+    有车型成本时，路线成本乘以车辆的倍率，出车的车辆再加上固定成本。
+    """
+    evaluation = evaluate(data, routes_to_arrays(routes), {'cost': get_objective(objective)},
+                          num_vehicles=len(routes))
+    costs = evaluation.costs['cost']
+    if any(key in data for key in VEHICLE_KEYS):
+        rates, fixed = vehicle_costs(dict(data, num_vehicles=len(routes)))
+        used = np.array([len(nodes) > 2 for nodes in routes])
+        costs = costs * rates + np.where(used, fixed, 0)
+    result = [Route(vehicle_id, list(nodes), float(evaluation.distance[vehicle_id]),
+                    int(evaluation.load[vehicle_id]), float(costs[vehicle_id]))
+              for vehicle_id, nodes in enumerate(routes)]
+    return Solution(
+        result,
+        float(evaluation.distance.sum()),
+        float(costs.sum()),
+        objective_value)
+
+
+def with_cost(data, solution, cost):
+    """按另一个成本函数（名称或函数）重新计算解的成本，路线和目标值不变。
+
+    用于按距离优化、再报告运输成本的场景。
+    """
+    routes = [route.nodes for route in solution.routes]
+    return make_solution(prepare_data(data), routes, cost, solution.objective)
+
+
+def solve_model(model, parameters, initial_routes=None):
+    """求解已建好的模型；给出 initial_routes 时以这些路线为初始解（热启动）。
+
+    initial_routes 为每辆车经过的客户节点列表，不含仓库。
+    """
+    routing = model.routing
+    if initial_routes is None:
+        return routing.SolveWithParameters(parameters)
+    routing.CloseModelWithParameters(parameters)
+    routes = [[model.manager.NodeToIndex(node) for node in nodes] for nodes in initial_routes]
+    initial_assignment = routing.ReadAssignmentFromRoutes(routes, True)
+    if initial_assignment is None:
+        # 初始路线不可行（例如超出容量），退回到从头求解
+        return routing.SolveWithParameters(parameters)
+    return routing.SolveFromAssignmentWithParameters(initial_assignment, parameters)
+
+
+def solve(data, objective='distance', first_solution_strategy='PATH_CHEAPEST_ARC',
+          local_search_metaheuristic=None, time_limit=None,
+          max_distance=None, span_cost_coefficient=0, initial_routes=None, monitor=None):
+    """求解一个 CVRP 实例，没有可行解时返回 None。
+
+    monitor（例如 vrp.telemetry.SearchMonitor）不为空时，求解前调用 monitor.attach(model)。
+    """
+    data = prepare_data(data)
+    model = build_model(data, objective, max_distance, span_cost_coefficient)
+    parameters = search_parameters(
+        first_solution_strategy, local_search_metaheuristic, time_limit)
+    if monitor is not None:
+        monitor.attach(model)
+    assignment = solve_model(model, parameters, initial_routes)
+    if not assignment:
+        return None
+    routes = extract_routes(data, model.manager, model.routing, assignment)
+    objective_value = to_real(assignment.ObjectiveValue(), model.cost_scale)
+    return make_solution(data, routes, objective, objective_value)
+
+
+def print_solution(solution):
+    """在控制台上打印解决方案。"""
+    for route in solution.routes:
+        plan_output = f'Route for vehicle {route.vehicle_id}:\n'
+        plan_output += ' -> '.join(str(node) for node in route.nodes)
+        plan_output += f'\nDistance of the route: {route.distance:.2f}m'
+        plan_output += f'\nLoad of the route: {route.load}'
+        plan_output += f'\nCost of the route: {route.cost:.2f}\n'
+        print(plan_output)
+    print(f'Total distance of all routes: {solution.distance:.2f}m')
+    print(f'Total cost of all routes: {solution.cost:.2f}')
@@ -0,0 +1,187 @@
+"""大规模实例的稀疏 k 近邻候选图。
+
+节点很多时，稠密的 n×n 距离矩阵既占内存，其中绝大多数弧也不会出现在好的解里。
+这里用网格索引从坐标求每个节点的 k 个最近邻，把每个节点的 NextVar 限制为
+近邻加上仓库（路线终点），距离只计算候选弧，内存为 O(n·k)。
+"""
+import math
+
+import numpy as np
+from ortools.constraint_solver import pywrapcp
+
+from vrp.distance import as_coordinates, distance_matrix
+from vrp.model import add_capacity_dimension, register_distance_matrix
+from vrp.precision import scale_matrix
+from vrp.savings import assign_vehicles, knn_savings_routes
+from vrp.solver import Model, Route, Solution, search_parameters, solve_model
+
+
+def _grid(coords, cell):
+    # 把每个点放进边长为 cell 的网格，返回 (网格坐标, {网格: 点的下标数组})
+    cells = np.floor((coords - coords.min(axis=0)) / cell).astype(np.int64)
+    order = np.lexsort((cells[:, 1], cells[:, 0]))
+    keys, starts = np.unique(cells[order], axis=0, return_index=True)
+    buckets = dict(zip(map(tuple, keys), np.split(order, starts[1:])))
+    return cells, buckets
+
+
+def _ring(buckets, cx, cy, radius):
+    # 以 (cx, cy) 为中心、半径为 radius 的方形网格范围内的所有点
+    found = [buckets[(x, y)]
+             for x in range(cx - radius, cx + radius + 1)
+             for y in range(cy - radius, cy + radius + 1)
+             if (x, y) in buckets]
+    return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+
+def knn_graph(nodes, k):
+    """求每个节点的 k 个最近邻（不含自身），返回 (neighbors, distances)，形状均为 (n, k)。"""
+    coords = as_coordinates(nodes)
+    num_nodes = len(coords)
+    k = min(k, num_nodes - 1)
+    extent = np.ptp(coords, axis=0).max() or 1.0
+    # 平均每个网格约 k 个点
+    cell = extent / max(1.0, math.sqrt(num_nodes / max(k, 1)))
+    cells, buckets = _grid(coords, cell)
+
+    neighbors = np.empty((num_nodes, k), dtype=np.int64)
+    distances = np.empty((num_nodes, k), dtype=np.float64)
+    for (cx, cy), members in buckets.items():
+        radius = 1
+        candidates = _ring(buckets, cx, cy, radius)
+        while len(candidates) <= k:
+            radius += 1
+            candidates = _ring(buckets, cx, cy, radius)
+        block = np.hypot(coords[members, None, 0] - coords[None, candidates, 0],
+                         coords[members, None, 1] - coords[None, candidates, 1])
+        block[members[:, None] == candidates[None, :]] = np.inf
+        kth = np.partition(block, k - 1, axis=1)[:, k - 1].max()
+        # 范围外的点到网格内任一点的距离至少为 radius * cell，不够时扩大范围
+        needed = int(math.ceil(kth / cell))
+        if needed > radius:
+            candidates = _ring(buckets, cx, cy, needed)
+            block = np.hypot(coords[members, None, 0] - coords[None, candidates, 0],
+                             coords[members, None, 1] - coords[None, candidates, 1])
+            block[members[:, None] == candidates[None, :]] = np.inf
+        nearest = np.argpartition(block, k - 1, axis=1)[:, :k]
+        nearest_distances = np.take_along_axis(block, nearest, axis=1)
+        order = np.argsort(nearest_distances, axis=1)
+        neighbors[members] = candidates[np.take_along_axis(nearest, order, axis=1)]
+        distances[members] = np.take_along_axis(nearest_distances, order, axis=1)
+    return neighbors, distances
+
+
+def symmetric_neighbors(neighbors):
+    """对称化候选图：j 是 i 的近邻时，i 也算 j 的近邻。返回每个节点的候选数组列表。"""
+    num_nodes, k = neighbors.shape
+    sources = np.concatenate([np.repeat(np.arange(num_nodes), k), neighbors.ravel()])
+    targets = np.concatenate([neighbors.ravel(), np.repeat(np.arange(num_nodes), k)])
+    edges = np.unique(np.stack([sources, targets], axis=1), axis=0)
+    starts = np.searchsorted(edges[:, 0], np.arange(num_nodes))
+    return np.split(edges[:, 1], starts[1:])
+
+
+def restrict_to_neighbors(manager, routing, neighbors, depot=0):
+    """把每个客户节点的 NextVar 限制为它的（对称化后的）近邻和各车辆的终点。"""
+    ends = [routing.End(vehicle) for vehicle in range(routing.vehicles())]
+    for node, row in enumerate(symmetric_neighbors(neighbors)):
+        if node == depot:
+            continue
+        allowed = [manager.NodeToIndex(int(other)) for other in row if other != depot]
+        routing.NextVar(manager.NodeToIndex(node)).SetValues(allowed + ends)
+
+
+def register_sparse_distances(manager, routing, nodes, neighbors, distances,
+                              depot=0, decimals=1, profiler=None):
+    """按需计算距离的转移回调，只预先保存候选弧，内存为 O(n·k)。
+
+    这里不得不回到 Python 回调；节点数不大、稠密矩阵放得下时应使用
+    register_distance_matrix，再配合 restrict_to_neighbors。
+    profiler（vrp.telemetry.CallbackProfiler）不为空时统计回调的调用次数和耗时。
+    """
+    coords = as_coordinates(nodes)
+    scale = 10 ** decimals
+    scaled = np.rint(distances * scale).astype(np.int64)
+    candidate = {}
+    for node, (row, values) in enumerate(zip(neighbors.tolist(), scaled.tolist())):
+        candidate.update(((node, other), value) for other, value in zip(row, values))
+    x, y = coords[:, 0].tolist(), coords[:, 1].tolist()
+
+    def distance_callback(from_index, to_index):
+        from_node = manager.IndexToNode(from_index)
+        to_node = manager.IndexToNode(to_index)
+        value = candidate.get((from_node, to_node))
+        if value is None:
+            # 非候选弧（多为进出仓库的弧）才临时计算
+            value = round(math.hypot(x[from_node] - x[to_node], y[from_node] - y[to_node]) * scale)
+        return value
+
+    if profiler is not None:
+        distance_callback = profiler.wrap('distance', distance_callback)
+    return routing.RegisterTransitCallback(distance_callback), scale
+
+
+def path_distance(nodes, path, decimals=1):
+    """沿路径累加距离（每段先按 decimals 取整，与距离矩阵一致）。"""
+    coords = as_coordinates(nodes)[np.asarray(path, dtype=np.int64)]
+    return float(np.round(np.hypot(*np.diff(coords, axis=0).T), decimals).sum())
+
+
+def solve_sparse(nodes, demands, vehicle_capacities, k=20, depot=0, dense_limit=3000,
+                 first_solution_strategy='PATH_CHEAPEST_ARC', local_search_metaheuristic=None,
+                 time_limit=None, monitor=None, profiler=None, warm_start=True):
+    """在 k 近邻候选图上求解，返回 Solution，没有可行解时返回 None。
+
+    节点数不超过 dense_limit 时仍使用稠密矩阵注册（C++ 查表），只限制 NextVar；
+    超过时改为按需计算距离，避免 O(n²) 内存。
+
+    warm_start 为真时，首解由 vrp.savings.knn_savings_routes 在近邻图上构造
+    （O(n·k)，不经过距离回调），再通过 ReadAssignmentFromRoutes 交给求解器；
+    车辆不够等情况下才退回 first_solution_strategy。OR-Tools 的 SAVINGS 和
+    PARALLEL_CHEAPEST_INSERTION 要看约 O(n²) 条弧，走 Python 回调时很慢：
+    随机均匀的 n=2000、k=20、dense_limit=100、time_limit=5 下两者都没有解，
+    PATH_CHEAPEST_ARC 得到 141948，热启动得到 115763（n=600、time_limit=2 时
+    分别为无解、50530 和 40668），所以默认用热启动加 PATH_CHEAPEST_ARC。
+    monitor 和 profiler 见 vrp.telemetry。
+    """
+    coords = as_coordinates(nodes)
+    demands = np.asarray(demands, dtype=np.int64)
+    num_nodes = len(coords)
+    neighbors, distances = knn_graph(coords, k)
+
+    manager = pywrapcp.RoutingIndexManager(num_nodes, len(vehicle_capacities), depot)
+    routing = pywrapcp.RoutingModel(manager)
+    if num_nodes <= dense_limit:
+        matrix, scale = scale_matrix(distance_matrix(coords))
+        transit_callback_index = register_distance_matrix(routing, matrix)
+    else:
+        transit_callback_index, scale = register_sparse_distances(
+            manager, routing, coords, neighbors, distances, depot, profiler=profiler)
+    routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
+    add_capacity_dimension(routing, demands, vehicle_capacities)
+    restrict_to_neighbors(manager, routing, neighbors, depot)
+
+    model = Model(manager, routing, scale, scale)
+    if monitor is not None:
+        monitor.attach(model)
+    initial = None
+    if warm_start:
+        routes = knn_savings_routes(coords, demands, max(vehicle_capacities), neighbors, distances,
+                                    depot)
+        initial = assign_vehicles({'demands': demands, 'vehicle_capacities': vehicle_capacities},
+                                  routes)
+    assignment = solve_model(model, search_parameters(
+        first_solution_strategy, local_search_metaheuristic, time_limit), initial)
+    if not assignment:
+        return None
+    routes = []
+    for vehicle_id in range(len(vehicle_capacities)):
+        index = routing.Start(vehicle_id)
+        path = [manager.IndexToNode(index)]
+        while not routing.IsEnd(index):
+            index = assignment.Value(routing.NextVar(index))
+            path.append(manager.IndexToNode(index))
+        distance = path_distance(coords, path)
+        routes.append(Route(vehicle_id, path, distance, int(demands[path].sum()), distance))
+    total = sum(route.distance for route in routes)
+    return Solution(routes, total, total, assignment.ObjectiveValue() / scale)
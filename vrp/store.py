@@ -0,0 +1,116 @@
+"""磁盘上的距离矩阵缓存（内存映射）。
+
+矩阵以 .npy 文件保存，旁边的 .json 记录元数据；文件名是坐标、距离度量、
+小数位数和数据类型的哈希。同一组站点再次求解时直接映射已有文件，不再重新计算，
+多个求解进程映射同一个文件时共享操作系统的页缓存。总大小超过预算时，
+按最近访问时间淘汰最久未用的矩阵。
+
+    store = MatrixStore('~/.cache/vrp/matrices', budget=8 << 30)
+    matrix = store.get(coordinates)
+"""
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from vrp.distance import METRICS, as_coordinates
+
+DEFAULT_ROOT = Path(os.environ.get('VRP_MATRIX_STORE', '~/.cache/vrp/matrices')).expanduser()
+
+
+def matrix_key(nodes, metric='euclidean', decimals=1, dtype=np.float64):
+    """坐标集合与度量方式的内容哈希。"""
+    coords = np.ascontiguousarray(as_coordinates(nodes))
+    digest = hashlib.sha256(coords.tobytes())
+    digest.update(f'{coords.shape}|{metric}|{decimals}|{np.dtype(dtype).str}'.encode())
+    return digest.hexdigest()[:32]
+
+
+class MatrixStore:
+    """按内容哈希缓存距离矩阵，budget 为磁盘预算（字节）。"""
+
+    def __init__(self, root=DEFAULT_ROOT, budget=8 << 30):
+        self.root = Path(root).expanduser()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.budget = budget
+
+    def _paths(self, key):
+        return self.root / f'{key}.npy', self.root / f'{key}.json'
+
+    def load(self, key):
+        """按键只读映射已有的矩阵，不存在时返回 None。"""
+        path, _ = self._paths(key)
+        try:
+            matrix = np.load(path, mmap_mode='r')
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # 记录访问时间，用于 LRU 淘汰
+        return matrix
+
+    def metadata(self, key):
+        """读取矩阵的元数据。"""
+        _, meta_path = self._paths(key)
+        with open(meta_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def get(self, nodes, metric='euclidean', decimals=1, dtype=np.float64):
+        """取距离矩阵（只读 np.memmap），缓存中没有时计算并写入。"""
+        coords = as_coordinates(nodes)
+        key = matrix_key(coords, metric, decimals, dtype)
+        matrix = self.load(key)
+        if matrix is not None:
+            return matrix
+
+        path, meta_path = self._paths(key)
+        num_nodes = len(coords)
+        # 先写临时文件再改名，其他进程不会读到写了一半的矩阵
+        tmp_path = path.with_name(f'{key}.{os.getpid()}.tmp.npy')
+        try:
+            out = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=dtype,
+                                            shape=(num_nodes, num_nodes))
+            METRICS[metric](coords, decimals=decimals, dtype=dtype, out=out)
+            out.flush()
+            del out
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump({'num_nodes': num_nodes, 'metric': metric, 'decimals': decimals,
+                           'dtype': np.dtype(dtype).str, 'created': time.time()}, f)
+            os.replace(tmp_path, path)
+        finally:
+            # 计算或写入失败（例如磁盘已满）时不留下临时文件
+            tmp_path.unlink(missing_ok=True)
+        self.evict(keep=key)
+        return self.load(key)
+
+    def entries(self):
+        """缓存中的矩阵，按最近访问时间从旧到新排列：[(访问时间, 大小, 键)]。
+
+        大小包括旁边的 .json 元数据文件。
+        """
+        entries = []
+        for path in self.root.glob('*.npy'):
+            if path.name.endswith('.tmp.npy'):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # 其他进程刚刚淘汰
+                continue
+            meta_path = path.with_suffix('.json')
+            size = stat.st_size + (meta_path.stat().st_size if meta_path.exists() else 0)
+            entries.append((stat.st_mtime, size, path.stem))
+        return sorted(entries)
+
+    def evict(self, keep=None):
+        """淘汰最久未用的矩阵，直到总大小不超过预算。"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.budget:
+                break
+            if key == keep:
+                continue
+            for path in self._paths(key):
+                path.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,163 @@
+"""求解过程的监控：搜索进度、时间-质量曲线和 Python 回调的开销。
+
+SearchMonitor 通过 AddAtSolutionCallback 记录每个改进解的时间、目标值、
+分支数和失败数；CallbackProfiler 包装 Python 回调，统计调用次数和耗时。
+曲线可导出为 CSV 或 JSON，用来根据实测而不是猜测设置 time_limit。
+
+用法：python -m vrp.telemetry instance.jsonl --time-limit 10 --out curve.csv
+      python -m vrp.telemetry stops.csv --profile --k 20   # 统计 vrp.sparse 的 Python 距离回调
+"""
+import argparse
+import csv
+import json
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from vrp.distance import distance_matrix
+from vrp.instances import load_instance
+from vrp.precision import to_real
+from vrp.solver import solve
+from vrp.sparse import solve_sparse
+
+Event = namedtuple('Event', ['elapsed', 'objective', 'branches', 'failures', 'solutions'])
+CallbackStats = namedtuple('CallbackStats', ['calls', 'seconds'])
+
+# 默认统计的相对差距：达到最终最优值的 10%、5%、1% 以内和最优值本身
+GAPS = (0.1, 0.05, 0.01, 0.0)
+
+
+class SearchMonitor:
+    """记录搜索过程中每个改进解的监视器，传给 solve(..., monitor=...) 使用。"""
+
+    def __init__(self):
+        self.events = []
+        self.solutions = 0
+        self.start = None
+        self.routing = None
+        self.cost_scale = 1
+
+    def attach(self, model):
+        """注册到模型上，从此刻开始计时。"""
+        self.routing = model.routing
+        self.cost_scale = model.cost_scale
+        self.routing.AddAtSolutionCallback(self)
+        self.start = time.perf_counter()
+
+    def __call__(self):
+        self.solutions += 1
+        objective = to_real(self.routing.CostVar().Value(), self.cost_scale)
+        if self.events and objective >= self.events[-1].objective:
+            return
+        solver = self.routing.solver()
+        self.events.append(Event(time.perf_counter() - self.start, objective,
+                                 solver.Branches(), solver.Failures(), self.solutions))
+
+
+class CallbackProfiler:
+    """统计 Python 回调的调用次数和累计耗时。"""
+
+    def __init__(self):
+        self.calls = {}
+        self.seconds = {}
+
+    def wrap(self, name, callback):
+        """返回包装后的回调，注册到 OR-Tools 时用它代替原回调。"""
+        self.calls.setdefault(name, 0)
+        self.seconds.setdefault(name, 0.0)
+
+        def profiled(*args):
+            start = time.perf_counter()
+            try:
+                return callback(*args)
+            finally:
+                self.seconds[name] += time.perf_counter() - start
+                self.calls[name] += 1
+
+        return profiled
+
+    def stats(self):
+        """返回 {回调名: CallbackStats}。"""
+        return {name: CallbackStats(self.calls[name], self.seconds[name]) for name in self.calls}
+
+
+def time_to_quality(events, gaps=GAPS):
+    """每个相对差距第一次达到时的时间 {差距: 秒}，相对于最终的最优目标值。"""
+    if not events:
+        return {}
+    best = events[-1].objective
+    reached = {}
+    for gap in gaps:
+        target = best + abs(best) * gap
+        reached[gap] = next(event.elapsed for event in events if event.objective <= target)
+    return reached
+
+
+def write_curve(events, path):
+    """把时间-质量曲线写入 CSV 或 JSON 文件（按扩展名判断）。"""
+    path = Path(path)
+    rows = [event._asdict() for event in events]
+    if path.suffix == '.json':
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+        return
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=Event._fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def print_summary(monitor, profiler=None):
+    """打印搜索过程的概要。"""
+    if not monitor.events:
+        print('没有找到解')
+        return
+    first, last = monitor.events[0], monitor.events[-1]
+    print(f'首个解：{first.elapsed:.3f}s，目标值 {first.objective:.2f}')
+    print(f'最优解：{last.elapsed:.3f}s，目标值 {last.objective:.2f}，'
+          f'共 {monitor.solutions} 个解、{len(monitor.events)} 次改进，'
+          f'{last.branches} 次分支、{last.failures} 次失败')
+    for gap, elapsed in time_to_quality(monitor.events).items():
+        print(f'  距最优 {gap:.0%} 以内：{elapsed:.3f}s')
+    for name, stats in (profiler.stats() if profiler else {}).items():
+        per_call = stats.seconds / stats.calls * 1e6 if stats.calls else 0
+        print(f'回调 {name}：{stats.calls} 次，共 {stats.seconds:.3f}s（{per_call:.2f}µs/次）')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='记录一次求解的时间-质量曲线')
+    parser.add_argument('path', help='实例文件，取其中第一个实例')
+    parser.add_argument('--time-limit', type=float, default=10)
+    parser.add_argument('--objective', default='distance')
+    parser.add_argument('--strategy', default='PATH_CHEAPEST_ARC')
+    parser.add_argument('--metaheuristic', default='GUIDED_LOCAL_SEARCH')
+    parser.add_argument('--out', default=None, help='曲线输出文件（.csv 或 .json）')
+    parser.add_argument('--profile', action='store_true',
+                        help='改用 vrp.sparse 按需计算距离的 Python 回调求解，并统计回调开销')
+    parser.add_argument('--k', type=int, default=20, help='--profile 时的近邻个数')
+    args = parser.parse_args()
+
+    instance = load_instance(args.path)
+    monitor = SearchMonitor()
+    profiler = None
+    if args.profile:
+        if 'coordinates' not in instance:
+            parser.error('--profile 需要带坐标的实例')
+        profiler = CallbackProfiler()
+        solve_sparse(instance['coordinates'], instance['demands'],
+                     instance['vehicle_capacities'], args.k, instance.get('depot', 0),
+                     dense_limit=0, first_solution_strategy=args.strategy,
+                     local_search_metaheuristic=args.metaheuristic, time_limit=args.time_limit,
+                     monitor=monitor, profiler=profiler)
+    else:
+        if 'distance_matrix' not in instance:
+            instance['distance_matrix'] = distance_matrix(instance['coordinates'])
+        solve(instance, args.objective, args.strategy, args.metaheuristic, args.time_limit,
+              monitor=monitor)
+    print_summary(monitor, profiler)
+    if args.out:
+        write_curve(monitor.events, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""时间窗与服务时间。
+
+行驶时间 = 距离 / 速度，出发节点的服务时间并入同一个转移矩阵，
+注册为原生的转移矩阵，搜索时没有逐弧的 Python 计算。
+建模前先向量化地收紧时间窗：最早开始时间不早于任何可行前驱的最早到达，
+最晚开始时间不晚于还能赶上任何可行后继的时刻；收紧后时间窗为空的节点直接报错，
+赶不上的弧从 NextVar 的取值中删去，缩小搜索空间。
+
+数据中的字段：'time_windows'（每个节点的 (最早, 最晚)，整数时间单位）、
+可选的 'service_times'、'speed'（每个时间单位行驶的距离，默认 1），
+或直接给出行驶时间 'time_matrix'。
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from vrp.model import register_distance_matrix
+
+TIME_KEYS = ('time_windows', 'service_times', 'speed', 'time_matrix')
+
+WindowCheck = namedtuple('WindowCheck', ['windows', 'feasible_arcs', 'infeasible'])
+
+
+def travel_times(distance_matrix, speed=1, service_times=None):
+    """行驶时间加上出发节点的服务时间，取整后的 int64 矩阵，对角线为 0。"""
+    times = np.rint(np.asarray(distance_matrix, dtype=np.float64) / speed)
+    if service_times is not None:
+        times += np.asarray(service_times, dtype=np.float64)[:, None]
+    np.fill_diagonal(times, 0)
+    return times.astype(np.int64)
+
+
+def time_data(data):
+    """从数据中取 (行驶时间矩阵, 时间窗)，没有时间窗时返回 None。"""
+    if data.get('time_windows') is None:
+        return None
+    if data.get('time_matrix') is not None:
+        times = np.array(data['time_matrix'], dtype=np.int64)
+        if data.get('service_times') is not None:
+            times += np.asarray(data['service_times'], dtype=np.int64)[:, None]
+            np.fill_diagonal(times, 0)
+    else:
+        times = travel_times(data['distance_matrix'], data.get('speed', 1),
+                             data.get('service_times'))
+    windows = np.asarray(data['time_windows'], dtype=np.int64)
+    if windows.shape != (len(times), 2):
+        raise ValueError(f'时间窗的形状应为 {(len(times), 2)}，实际为 {windows.shape}')
+    return times, windows
+
+
+def check_windows(times, windows, depot=0, iterations=20):
+    """收紧时间窗并检查可行性，返回 WindowCheck。
+
+    windows 为收紧后的 (n, 2) 数组；feasible_arcs[i, j] 表示从 i 出发能赶上 j 的时间窗；
+    infeasible 为无法服务的客户（时间窗为空，或没有可行的前驱或后继）。
+    """
+    times = np.asarray(times, dtype=np.int64)
+    earliest = windows[:, 0].astype(np.int64)
+    latest = windows[:, 1].astype(np.int64)
+    customers = np.ones(len(times), dtype=bool)
+    customers[depot] = False
+    big = np.iinfo(np.int64).max // 4
+    for _ in range(iterations):
+        arcs = earliest[:, None] + times <= latest[None, :]
+        np.fill_diagonal(arcs, False)
+        arrive = np.where(arcs, earliest[:, None] + times, big).min(axis=0)
+        leave = np.where(arcs, latest[None, :] - times, -big).max(axis=1)
+        new_earliest = np.where(customers, np.maximum(earliest, np.minimum(latest, arrive)),
+                                earliest)
+        new_latest = np.where(customers, np.minimum(latest, np.maximum(earliest, leave)), latest)
+        if np.array_equal(new_earliest, earliest) and np.array_equal(new_latest, latest):
+            break
+        earliest, latest = new_earliest, new_latest
+    arcs = earliest[:, None] + times <= latest[None, :]
+    np.fill_diagonal(arcs, False)
+    stranded = ~arcs[:, depot] & ~(arcs[:, customers].any(axis=1))
+    unreachable = ~arcs[depot] & ~(arcs[customers].any(axis=0))
+    infeasible = np.flatnonzero(customers & ((earliest > latest) | stranded | unreachable))
+    return WindowCheck(np.stack([earliest, latest], axis=1), arcs, infeasible)
+
+
+def prune_arcs(manager, routing, feasible_arcs, depot=0):
+    """从每个节点的 NextVar 中删去赶不上时间窗的客户。"""
+    num_nodes = len(feasible_arcs)
+    for node in range(num_nodes):
+        blocked = [manager.NodeToIndex(other) for other in np.flatnonzero(~feasible_arcs[node])
+                   if other != depot and other != node]
+        if not blocked:
+            continue
+        if node == depot:
+            for vehicle in range(routing.vehicles()):
+                routing.NextVar(routing.Start(vehicle)).RemoveValues(blocked)
+        else:
+            routing.NextVar(manager.NodeToIndex(node)).RemoveValues(blocked)
+
+
+def add_time_dimension(manager, routing, times, windows, depot=0, max_waiting=None):
+    """添加 'Time' 维度并设置每个节点和每辆车起止的时间窗，返回该维度。
+
+    max_waiting 为每个节点允许的最长等待时间，默认不限（不超过计划时段）。
+    """
+    horizon = int(windows[:, 1].max())
+    transit_callback_index = register_distance_matrix(routing, times)
+    routing.AddDimension(transit_callback_index,
+                         horizon if max_waiting is None else int(max_waiting),
+                         horizon, False, 'Time')
+    dimension = routing.GetDimensionOrDie('Time')
+    for node, (earliest, latest) in enumerate(windows.tolist()):
+        if node != depot:
+            dimension.CumulVar(manager.NodeToIndex(node)).SetRange(earliest, latest)
+    earliest, latest = (int(value) for value in windows[depot])
+    for vehicle in range(routing.vehicles()):
+        for index in (routing.Start(vehicle), routing.End(vehicle)):
+            dimension.CumulVar(index).SetRange(earliest, latest)
+        routing.AddVariableMinimizedByFinalizer(dimension.CumulVar(routing.Start(vehicle)))
+        routing.AddVariableMinimizedByFinalizer(dimension.CumulVar(routing.End(vehicle)))
+    return dimension
+
+
+def apply_time_windows(manager, routing, data, max_waiting=None):
+    """按数据中的时间窗建模：检查、收紧、剪枝并添加 'Time' 维度。
+
+    有客户无法在时间窗内服务时抛出 ValueError；数据没有时间窗时返回 None。
+    """
+    found = time_data(data)
+    if found is None:
+        return None
+    times, windows = found
+    depot = data.get('depot', 0)
+    check = check_windows(times, windows, depot)
+    if len(check.infeasible):
+        raise ValueError(f'以下客户无法在时间窗内服务：{check.infeasible.tolist()}')
+    prune_arcs(manager, routing, check.feasible_arcs, depot)
+    return add_time_dimension(manager, routing, times, check.windows, depot, max_waiting)
+
+
+def schedule(times, windows, route):
+    """按最早可行的方式计算路线上每个节点的开始服务时间（含起点和终点）。"""
+    start = [int(windows[route[0], 0])]
+    for previous, node in zip(route, route[1:]):
+        start.append(max(start[-1] + int(times[previous, node]), int(windows[node, 0])))
+    return start
@@ -0,0 +1,193 @@
+"""距离矩阵的一致性检查（向量化）。
+
+检查矩阵与坐标是否一致（容差按矩阵的舍入位数确定）、是否对称、对角线是否为 0、
+是否有负数，以及三角不等式：节点不多时枚举全部三元组，否则随机抽样。
+结果以 Report 返回，可以在求解前对每个实例运行。
+
+用法：python -m vrp.validate instances.jsonl [--decimals 1]
+"""
+import argparse
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+from vrp.distance import as_coordinates, iter_distance_blocks
+from vrp.instances import iter_instances
+
+# 最多记录的反例个数
+MAX_EXAMPLES = 10
+
+Report = namedtuple('Report', [
+    'num_nodes', 'tolerance',
+    'coordinate_mismatches', 'max_coordinate_error',
+    'asymmetric', 'max_asymmetry',
+    'nonzero_diagonal', 'negative',
+    'triangle_checked', 'triangle_violations', 'max_triangle_excess',
+    'examples', 'ok',
+])
+
+
+def rounding_tolerance(decimals):
+    """按 decimals 位小数舍入后允许的误差（半个单位）。"""
+    return 0.5 * 10.0 ** -decimals + 1e-9
+
+
+def _examples(mask, matrix, expected=None, offset=0):
+    # 取前 MAX_EXAMPLES 个反例：(i, j, 实际值[, 期望值])
+    found = []
+    for i, j in np.argwhere(mask)[:MAX_EXAMPLES]:
+        i = int(i) + offset
+        example = (i, int(j), float(matrix[i, j]))
+        if expected is not None:
+            example += (float(expected[i - offset, j]),)
+        found.append(example)
+    return found
+
+
+def check_coordinates(matrix, nodes, tolerance, block_rows=None):
+    """按行分块比较矩阵与坐标算出的欧几里得距离，返回 (不一致个数, 最大误差, 反例)。"""
+    mismatches, max_error, examples = 0, 0.0, []
+    for start, stop, block in iter_distance_blocks(nodes, block_rows, decimals=None):
+        error = np.abs(matrix[start:stop] - block)
+        bad = error > tolerance
+        mismatches += int(bad.sum())
+        max_error = max(max_error, float(error.max(initial=0)))
+        if len(examples) < MAX_EXAMPLES and bad.any():
+            examples += _examples(bad, matrix, block, start)[:MAX_EXAMPLES - len(examples)]
+    return mismatches, max_error, examples
+
+
+def check_triangle(matrix, tolerance, exact_limit=300, samples=1_000_000, seed=0):
+    """检查 d(i, j) <= d(i, k) + d(k, j)，返回 (检查的三元组数, 违反个数, 最大超出量, 反例)。
+
+    节点数不超过 exact_limit 时按中间点 k 逐个枚举全部三元组，否则随机抽取 samples 个。
+    反例为 (i, k, j, 超出量)。
+    """
+    num_nodes = len(matrix)
+    violations, max_excess, examples = 0, 0.0, []
+    if num_nodes <= exact_limit:
+        checked = num_nodes ** 3
+        for k in range(num_nodes):
+            excess = matrix - matrix[:, k, None] - matrix[None, k, :]
+            bad = excess > tolerance
+            count = int(bad.sum())
+            if count:
+                violations += count
+                max_excess = max(max_excess, float(excess.max()))
+                for i, j in np.argwhere(bad)[:MAX_EXAMPLES - len(examples)]:
+                    examples.append((int(i), k, int(j), float(excess[i, j])))
+        return checked, violations, max_excess, examples
+    rng = np.random.default_rng(seed)
+    i, k, j = rng.integers(num_nodes, size=(3, samples))
+    excess = matrix[i, j] - matrix[i, k] - matrix[k, j]
+    bad = np.flatnonzero(excess > tolerance)
+    if len(bad):
+        max_excess = float(excess[bad].max())
+        examples = [(int(i[t]), int(k[t]), int(j[t]), float(excess[t]))
+                    for t in bad[:MAX_EXAMPLES]]
+    return samples, len(bad), max_excess, examples
+
+
+def validate_matrix(matrix, nodes=None, decimals=1, tolerance=None, exact_limit=300,
+                    samples=1_000_000, seed=0):
+    """检查距离矩阵，返回 Report。
+
+    nodes 不为空时检查矩阵与坐标的一致性；tolerance 默认为按 decimals 位小数舍入的
+    半个单位，三角不等式允许三个舍入误差之和。
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    num_nodes = len(matrix)
+    if matrix.shape != (num_nodes, num_nodes):
+        raise ValueError(f'距离矩阵应为方阵，实际为 {matrix.shape}')
+    if tolerance is None:
+        tolerance = rounding_tolerance(decimals)
+    examples = {}
+
+    mismatches, max_error = 0, 0.0
+    if nodes is not None:
+        coords = as_coordinates(nodes)
+        if len(coords) != num_nodes:
+            raise ValueError(f'有 {len(coords)} 个坐标，但距离矩阵有 {num_nodes} 行')
+        mismatches, max_error, examples['coordinates'] = check_coordinates(
+            matrix, coords, tolerance)
+
+    asymmetry = np.abs(matrix - matrix.T)
+    asymmetric = asymmetry > tolerance
+    diagonal = np.abs(np.diagonal(matrix)) > tolerance
+    negative = matrix < 0
+    examples['asymmetric'] = _examples(np.triu(asymmetric), matrix)
+    examples['nonzero_diagonal'] = [(int(i), int(i), float(matrix[i, i]))
+                                    for i in np.flatnonzero(diagonal)[:MAX_EXAMPLES]]
+    examples['negative'] = _examples(negative, matrix)
+
+    checked, violations, max_excess, examples['triangle'] = check_triangle(
+        matrix, 3 * tolerance, exact_limit, samples, seed)
+
+    counts = (mismatches, int(np.triu(asymmetric).sum()), int(diagonal.sum()),
+              int(negative.sum()), violations)
+    return Report(
+        num_nodes=num_nodes,
+        tolerance=tolerance,
+        coordinate_mismatches=counts[0],
+        max_coordinate_error=max_error,
+        asymmetric=counts[1],
+        max_asymmetry=float(asymmetry.max(initial=0)),
+        nonzero_diagonal=counts[2],
+        negative=counts[3],
+        triangle_checked=checked,
+        triangle_violations=counts[4],
+        max_triangle_excess=max_excess,
+        examples={key: value for key, value in examples.items() if value},
+        ok=not any(counts),
+    )
+
+
+def validate_instance(instance, **options):
+    """检查实例的距离矩阵（有坐标时一并比较），返回 Report。"""
+    return validate_matrix(instance['distance_matrix'], instance.get('coordinates'), **options)
+
+
+def print_report(report, name=''):
+    """打印检查结果。"""
+    prefix = f'{name}：' if name else ''
+    if report.ok:
+        print(f'{prefix}距离矩阵验证通过（{report.num_nodes} 个节点，容差 {report.tolerance:g}，'
+              f'检查了 {report.triangle_checked} 个三元组）')
+        return
+    print(f'{prefix}距离矩阵有问题（{report.num_nodes} 个节点，容差 {report.tolerance:g}）：')
+    if report.coordinate_mismatches:
+        print(f'  与坐标不一致 {report.coordinate_mismatches} 处，最大误差 '
+              f'{report.max_coordinate_error:g}')
+    if report.asymmetric:
+        print(f'  不对称 {report.asymmetric} 对，最大差值 {report.max_asymmetry:g}')
+    if report.nonzero_diagonal:
+        print(f'  对角线非零 {report.nonzero_diagonal} 处')
+    if report.negative:
+        print(f'  负距离 {report.negative} 处')
+    if report.triangle_violations:
+        print(f'  违反三角不等式 {report.triangle_violations} 次（共检查 '
+              f'{report.triangle_checked} 个三元组），最大超出 {report.max_triangle_excess:g}')
+    for kind, examples in report.examples.items():
+        print(f'  {kind} 反例：{examples}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检查实例的距离矩阵')
+    parser.add_argument('path', help='JSONL / CSV / NPZ 实例文件或目录')
+    parser.add_argument('--decimals', type=int, default=1, help='距离矩阵的小数位数')
+    parser.add_argument('--samples', type=int, default=1_000_000, help='三角不等式的抽样个数')
+    args = parser.parse_args()
+
+    failed = 0
+    for instance in iter_instances(args.path):
+        if 'distance_matrix' not in instance:
+            continue
+        report = validate_instance(instance, decimals=args.decimals, samples=args.samples)
+        failed += not report.ok
+        print_report(report, instance['name'])
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()